@@ -2,6 +2,7 @@ import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from scipy.stats import poisson
+from models.teams import NAME_MAP, fold_name
 
 url = "https://www.football-data.co.uk/mmz4281/2526/D1.csv"
 url2 = "https://www.football-data.co.uk/mmz4281/2425/D1.csv"
@@ -79,35 +80,12 @@ def expected_goals(home_team, away_team, tbl, avg_home, avg_away, max_goals = 12
 
 lam_h, lam_a = expected_goals('Werder Bremen', 'Stuttgart', teams, avg_home, avg_away)
 
-NAME_MAP = {
-    "FC Bayern München": "Bayern Munich",
-    "FSV Mainz 05": "Mainz",
-    "Bor. Mönchengladbach": "M'gladbach",
-    "1. FC Köln": "FC Koln",
-    "Eintracht Frankfurt": "Ein Frankfurt",
-    "VfB Stuttgart": "Stuttgart",
-    "Werder Bremen": "Werder Bremen",
-    "SC Freiburg": "Freiburg",
-    "RB Leipzig": "RB Leipzig",
-    "Hamburger SV": "Hamburg",
-    "Bayer 04 Leverkusen": "Leverkusen",
-    "1. FC Union Berlin": "Union Berlin",
-    "VfL Wolfsburg": "Wolfsburg",
-    "FC St. Pauli": "St Pauli",
-    "1. FC Heidenheim 1846": "Heidenheim",
-    "1899 Hoffenheim": "Hoffenheim",
-    "Borussia Dortmund": "Dortmund",
-    "FC Augsburg": "Augsburg",
-}
-
 def normalize_team(name, teams_index):
     n = NAME_MAP.get(name, name)
     if n in teams_index:
         return n
     # fallback: strip accents and dots
-    import unicodedata, re
-    s = unicodedata.normalize('NFKD', n).encode('ascii', 'ignore').decode('ascii')
-    s = re.sub(r"[.']", "", s).strip()
+    s = fold_name(n)
     if s in teams_index:
         return s
     raise KeyError(f"Team not found after normalization: {name} -> {n}")
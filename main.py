@@ -1,27 +1,43 @@
-import yaml
 import argparse
 from src.auth import create_session
 from src.scraper import get_upcoming_matches
 from src.submitter import submit_tips
 from src.data import load_bundesliga_data
-from models.poisson import PoissonModel
-
-# Add more models here as you create them
-MODELS = {
-    "poisson": PoissonModel,
-}
+from models import get_model_class
 
 
 def main():
     # Parse command line arguments
     parser = argparse.ArgumentParser(description="Kicktipp Predictor")
     parser.add_argument("--submit", action="store_true", help="Submit predictions to Kicktipp")
+    parser.add_argument("--daemon", action="store_true", help="Keep running and submit tips before each kickoff")
+    parser.add_argument("--serve", action="store_true", help="Serve predictions over HTTP/JSON from a warm model")
     args = parser.parse_args()
     
     # Load config
+    import yaml
     with open("config.yaml", "r") as f:
         config = yaml.safe_load(f)
     
+    # Extra team name spellings (e.g. for other leagues)
+    if config['data'].get('alias_file'):
+        from models.teams import load_alias_file
+        load_alias_file(config['data']['alias_file'])
+    
+    if 'cache' in config:
+        from models.cache import configure_cache
+        configure_cache(**config['cache'])
+    
+    if args.daemon:
+        from src.scheduler import TipScheduler
+        TipScheduler(config).run()
+        return
+    
+    if args.serve:
+        from src.server import serve
+        serve(config)
+        return
+    
     # Load data
     print("Loading historical data...")
     df = load_bundesliga_data(config['data']['seasons'])
@@ -30,7 +46,7 @@ def main():
     # Initialize model
     model_name = config['model']
     model_config = config.get(model_name, {})
-    model = MODELS[model_name](**model_config)
+    model = get_model_class(model_name)(**model_config)
     
     print(f"Fitting {model_name} model...")
     model.fit(df)
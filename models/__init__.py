@@ -0,0 +1,19 @@
+import importlib
+
+# Model registry: config key -> "module:ClassName".
+# Modules are only imported when a model is actually selected, so adding a
+# model here does not slow down startup for everyone else.
+MODELS = {
+    "poisson": "models.poisson:PoissonModel",
+    "dixonColes": "models.dixon_coles:DixonColes",
+    "odds": "models.odds:OddsModel",
+}
+
+
+def get_model_class(name: str):
+    """Import and return the model class registered under `name`."""
+    if name not in MODELS:
+        raise KeyError(f"Unknown model '{name}'. Available: {', '.join(MODELS)}")
+    module_name, class_name = MODELS[name].split(":")
+    module = importlib.import_module(module_name)
+    return getattr(module, class_name)
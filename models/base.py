@@ -1,31 +1,17 @@
 from abc import ABC, abstractmethod
-from typing import List, Tuple, Dict
-
-NAME_MAP = {
-    "FC Bayern München": "Bayern Munich",
-    "FSV Mainz 05": "Mainz",
-    "Bor. Mönchengladbach": "M'gladbach",
-    "1. FC Köln": "FC Koln",
-    "Eintracht Frankfurt": "Ein Frankfurt",
-    "VfB Stuttgart": "Stuttgart",
-    "Werder Bremen": "Werder Bremen",
-    "SC Freiburg": "Freiburg",
-    "RB Leipzig": "RB Leipzig",
-    "Hamburger SV": "Hamburg",
-    "Bayer 04 Leverkusen": "Leverkusen",
-    "1. FC Union Berlin": "Union Berlin",
-    "VfL Wolfsburg": "Wolfsburg",
-    "FC St. Pauli": "St Pauli",
-    "1. FC Heidenheim 1846": "Heidenheim",
-    "1899 Hoffenheim": "Hoffenheim",
-    "Borussia Dortmund": "Dortmund",
-    "FC Augsburg": "Augsburg",
-}
+from typing import Iterable, List, Tuple, Dict
+from models.teams import TeamIndex
 
 class PredictionModel(ABC):
     """Base class for all prediction models."""
     
     name: str = "base"
+    team_index: TeamIndex = None
+    max_goals: int = 12
+    # Dixon-Coles low-score correlation; 0 means independent Poisson goals
+    rho: float = 0.0
+    # Score matrix cache; None uses the shared models.cache.SCORE_CACHE
+    score_cache = None
     
     @abstractmethod
     def fit(self, df) -> None:
@@ -36,12 +22,38 @@ class PredictionModel(ABC):
     def predict(self, home_team: str, away_team: str) -> Tuple[int, int]:
         """Predict the score for a single match."""
         pass
+
+    def expected_goals(self, home_team: str, away_team: str) -> Tuple[float, float]:
+        """Expected goals (lambda_home, lambda_away) for a match."""
+        raise NotImplementedError(f"The model '{self.name}' does not provide expected goals.")
+
+    def score_matrix(self, home_team: str, away_team: str):
+        """Matrix of P(home=i, away=j) for i, j in 0..max_goals (read-only, may be shared)."""
+        from models import cache, kernels
+
+        lam_home, lam_away = self.expected_goals(home_team, away_team)
+        score_cache = self.score_cache or cache.SCORE_CACHE
+        return score_cache.get(lam_home, lam_away, self.rho, self.max_goals, kernels.score_matrix)
+
     def predict_proba(self, home_team: str, away_team: str) -> Dict[str, float]:
         """
         Predict probabilities for common betting markets.
-        Default implementation raises an error, must be overridden.
+        Default implementation sums up the score matrix, so it needs `expected_goals`.
         """
-        raise NotImplementedError(f"The model '{self.name}' does not support probability predictions.")
+        import numpy as np
+
+        matrix = self.score_matrix(home_team, away_team)
+        goals = np.arange(matrix.shape[0])
+        total_goals = goals[:, None] + goals[None, :]
+        return {
+            "home_win": float(np.tril(matrix, -1).sum()),
+            "draw": float(np.trace(matrix)),
+            "away_win": float(np.triu(matrix, 1).sum()),
+            "over_2_5": float(matrix[total_goals > 2.5].sum()),
+            "under_2_5": float(matrix[total_goals < 2.5].sum()),
+            "btts_yes": float(matrix[1:, 1:].sum()),
+            "btts_no": float(matrix[0, :].sum() + matrix[1:, 0].sum()),
+        }
     
     def predict_matches(self, matches: List[Tuple[str, str]]) -> List[Dict]:
         """Predict scores for multiple matches."""
@@ -63,14 +75,14 @@ class PredictionModel(ABC):
                 })
         return results
 
+    def _build_team_index(self, names: Iterable[str]) -> None:
+        """Build the name -> integer ID index for the teams seen in `fit`."""
+        self.team_index = TeamIndex(names)
+
+    def _team_id(self, name: str) -> int:
+        """Map a Kicktipp or football-data team name to its integer ID."""
+        return self.team_index.id(name)
+
     def _normalize_team(self, name: str) -> str:
         """Map Kicktipp team names to football-data names."""
-        n = NAME_MAP.get(name, name)
-        if n in self.teams.index:
-            return n
-        import unicodedata, re
-        s = unicodedata.normalize('NFKD', n).encode('ascii', 'ignore').decode('ascii')
-        s = re.sub(r"[.']", "", s).strip()
-        if s in self.teams.index:
-            return s
-        raise KeyError(f"Team not found: {name} -> {n}")
\ No newline at end of file
+        return self.team_index.name(name)
@@ -0,0 +1,86 @@
+import math
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+import numpy as np
+
+
+class ScoreMatrixCache:
+    """
+    Bounded memo of score matrices keyed on (lambda_home, lambda_away, rho, max_goals).
+
+    A score matrix only depends on those inputs, so one cache is safely shared
+    by every model, refit and ensemble member. With `quantize`, expected goals
+    are rounded to that step (e.g. 0.001) before lookup and computation, so
+    near-identical inputs share an entry. Cached matrices are read-only.
+
+    Args:
+        maxsize: Number of matrices to keep (0 disables caching)
+        quantize: Rounding step for expected goals and rho, or None for exact keys
+        policy: 'lru' evicts the least recently used entry, 'fifo' the oldest one
+    """
+
+    def __init__(self, maxsize: int = 4096, quantize: Optional[float] = None, policy: str = "lru"):
+        if policy not in ("lru", "fifo"):
+            raise ValueError(f"Unknown eviction policy '{policy}' (use 'lru' or 'fifo')")
+        self.maxsize = maxsize
+        self.quantize = quantize
+        self.policy = policy
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, lam_home: float, lam_away: float, rho: float, max_goals: int,
+            compute: Callable[[float, float, float, int], np.ndarray]) -> np.ndarray:
+        """Return the cached matrix, calling `compute` with the (quantized) inputs on a miss."""
+        if not (math.isfinite(lam_home) and math.isfinite(lam_away) and math.isfinite(rho)):
+            # NaN keys never match each other; don't let them evict useful entries
+            return compute(float(lam_home), float(lam_away), float(rho), int(max_goals))
+        if self.quantize:
+            q = self.quantize
+            lam_home, lam_away, rho = round(lam_home / q) * q, round(lam_away / q) * q, round(rho / q) * q
+        key = (float(lam_home), float(lam_away), float(rho), int(max_goals))
+
+        with self._lock:
+            matrix = self._entries.get(key)
+            if matrix is not None:
+                self.hits += 1
+                if self.policy == "lru":
+                    self._entries.move_to_end(key)
+                return matrix
+            self.misses += 1
+
+        matrix = compute(*key)
+        matrix.setflags(write=False)
+        if self.maxsize > 0:
+            with self._lock:
+                self._entries[key] = matrix
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return matrix
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+        }
+
+
+# Shared by all models unless a model gets its own `score_cache`
+SCORE_CACHE = ScoreMatrixCache()
+
+
+def configure_cache(size: int = 4096, quantize: Optional[float] = None, policy: str = "lru") -> None:
+    """Replace the shared cache, e.g. from the `cache` section of config.yaml."""
+    global SCORE_CACHE
+    SCORE_CACHE = ScoreMatrixCache(size, quantize, policy)
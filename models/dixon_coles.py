@@ -1,15 +1,19 @@
 from models.base import PredictionModel
+from models import kernels
+from models.kernels import most_likely_score
+from models.teams import TeamIndex
+from typing import Dict, List
 import pandas as pd
 import numpy as np
-from scipy.stats import poisson
-from scipy import optimize
 
 class DixonColes(PredictionModel):
     """ """
     name = 'dixonColes'
 
-    def __init__(self, time_decay_alpha =0.001, regularization_lambda= 0.01, max_goals = 12):
+    def __init__(self, time_decay_alpha =0.001, regularization_lambda= 0.01, max_goals = 12, parameterization = 'linear'):
         super().__init__() # Correctly call the base constructor
+        if parameterization not in ('linear', 'log'):
+            raise ValueError(f"Unknown parameterization '{parameterization}' (use 'linear' or 'log')")
         self.max_goals = max_goals
         self.attack_params = None
         self.defense_params = None
@@ -17,105 +21,417 @@ class DixonColes(PredictionModel):
         self.rho = None
         self.time_decay_alpha = time_decay_alpha
         self.regularization_lambda = regularization_lambda # L2 penalty strength
+        # 'linear': positive strengths, sum(attack) == N, penalty pulls strengths towards 0
+        # 'log': log strengths, sum(log attack) == 0, no bounds, penalty pulls strengths towards 1.
+        #        Better conditioned, meant for pooled fits over many leagues/teams.
+        self.parameterization = parameterization
 
-    def tau(self,i,j,lam, mu, rho):
-        # This function now ensures it never returns a negative value
-        val = np.ones_like(lam,dtype=float)
-        mask_0_0 = (i == 0) & (j == 0)
-        mask_1_0 = (i == 1) & (j == 0)
-        mask_0_1 = (i == 0) & (j == 1)
-        mask_1_1 = (i == 1) & (j == 1)
-        val[mask_0_0] = 1- (lam[mask_0_0] * mu[mask_0_0] * rho)
-        val[mask_1_0] = 1 + (mu[mask_1_0] * rho)
-        val[mask_0_1] = 1 + (lam[mask_0_1] * rho)
-        val[mask_1_1] = 1 - rho
-        
-        # Clip the value to ensure it's not negative
-        return np.maximum(1e-9, val)
-    
     def fit(self, df: pd.DataFrame):
-        df = df.copy()
-
-        #get unique teamNames
-        names = pd.concat([df['HomeTeam'],df['AwayTeam'] ]).unique()
-        names.sort()
-        # Set self.teams so that _normalize_team works correctly
-        self.teams = pd.DataFrame(index=names)
-        names_map = {team: i for i,team in enumerate(names)}
-        number_teams = len(names)
+        _fit_single(self, df)
+
+    def _prepare(self, df: pd.DataFrame, compressed: Dict = None) -> Dict[str, np.ndarray]:
+        """
+        Team index and compressed training data for one fit.
+
+        The index is returned rather than stored, so a fit that fails to
+        converge keeps the previous index and parameters together.
+        `compressed` is the result of `_compress(df)` if it is already known.
+        """
+        if compressed is None:
+            compressed = _compress(df)
+        data = {k: v for k, v in compressed.items() if k not in ('inverse', 'age_in_days')}
         #add time decay weights to reduce impact of games in the far past
-        df['Date'] = pd.to_datetime(df['Date'])
-        df['age_in_days'] = (df['Date'].max() - df['Date']).dt.days
-        weights = np.exp(-0.001 * df['age_in_days'].values) 
-        
-        # --- Pre-calculate indices for vectorization ---
-        home_indices = df['HomeTeam'].map(names_map).values
-        away_indices = df['AwayTeam'].map(names_map).values
-        home_goals = df['FTHG'].values
-        away_goals = df['FTAG'].values
-        
-        initial_params = np.concatenate((
+        weights = np.exp(-self.time_decay_alpha * compressed['age_in_days'])
+        data['weights'] = np.bincount(compressed['inverse'], weights=weights)
+        return data
+
+    def _initial_params(self, team_index: TeamIndex) -> np.ndarray:
+        number_teams = len(team_index)
+        if self.attack_params is not None and list(self.attack_params.index) == team_index.names:
+            # Warm start from the previous fit (same teams, a few new results)
+            return np.concatenate((
+                self.attack_params.values,
+                self.defense_params.values,
+                [self.home_advantage],
+                [self.rho]
+            ))
+        return np.concatenate((
             np.ones(number_teams), #attack 
             np.ones(number_teams), #defense
             [1.0],
             [0.0]
         ))
 
-
-        def obj_func(x):
-            attack_param = x[0:number_teams]
-            defense_param = x[number_teams:2*number_teams]
-            home_adv_param = x[2*number_teams]
-            rho = x[2*number_teams+1]
-
-            # --- Vectorized Calculation (replaces the for loop) ---
-            # Calculate lambdas for all matches at once
-            lambda_home = attack_param[home_indices] * defense_param[away_indices] * home_adv_param
-            lambda_away = attack_param[away_indices] * defense_param[home_indices]
-            
-            # Calculate probability for all matches at once
-            p = self.tau(home_goals, away_goals, lambda_home, lambda_away, rho) * \
-                poisson.pmf(home_goals, lambda_home) * \
-                poisson.pmf(away_goals, lambda_away)
-            
-            # Sum the log-likelihood across all matches
-            log_likelihood = np.sum(weights * np.log(p + 1e-9))
-
-            # Penalize the sum of squares of the parameters to prevent them from getting too large
-            l2_penalty = self.regularization_lambda * np.sum(x**2)
-
-            return -log_likelihood + l2_penalty
-
-        # Bounds: attack, defense, and home_adv must be positive. rho is unbounded.
-        bounds = [(0.0001, None)] * (2 * number_teams + 1) + [(None, None)]
-
-        # Constraint: The sum of attack parameters must equal the number of teams
-        constraints = [{'type': 'eq', 'fun': lambda x: sum(x[0:number_teams]) - number_teams}]
-        optimize_res :optimize.OptimizeResult = optimize.minimize(obj_func, initial_params,bounds=bounds, constraints=constraints)
-        
-        if not optimize_res.success:
-            print("Warning: Optimizer failed to converge.")
-            return 
-        param_list = optimize_res.x
-        # --- Unpack and store the optimized parameters ---
+    def _set_params(self, param_list: np.ndarray, team_index: TeamIndex) -> None:
+        # --- Unpack and store the optimized parameters with the index they belong to ---
+        self.team_index = team_index
+        names = team_index.names
+        number_teams = len(names)
         self.attack_params = pd.Series(param_list[0:number_teams], index=names)
         self.defense_params = pd.Series(param_list[number_teams:2*number_teams], index=names)
         self.home_advantage = param_list[2*number_teams]
         self.rho = param_list[2*number_teams+1]
 
+    def expected_goals(self, home_team, away_team):
+        h = self._team_id(home_team)
+        a = self._team_id(away_team)
+        attack = self.attack_params.to_numpy()
+        defense = self.defense_params.to_numpy()
+        lam_home = attack[h] * defense[a] * self.home_advantage
+        lam_away = attack[a] * defense[h]
+        return lam_home, lam_away
 
     def predict(self, home_team, away_team):
-        h_team = self._normalize_team(home_team)
-        a_team = self._normalize_team(away_team)
-        lam_home = self.attack_params[h_team]*self.defense_params[a_team] * self.home_advantage
-        lam_away = self.attack_params[a_team]*self.defense_params[h_team] 
-
-        best = (0, 0)
-        best_p = 0.0
-        for i in range(self.max_goals + 1):
-            for j in range(self.max_goals + 1):
-                p = self.tau(i,j, lam_home, lam_away, self.rho) * poisson.pmf(i, lam_home) * poisson.pmf(j, lam_away)
-                if p > best_p:
-                    best_p = p
-                    best = (i, j)
-        return best
+        return most_likely_score(self.score_matrix(home_team, away_team))
+
+
+def _compress(df: pd.DataFrame) -> Dict:
+    """The part of `DixonColes._prepare` that does not depend on the model settings."""
+    from scipy.special import gammaln
+
+    #get unique teamNames
+    names = pd.concat([df['HomeTeam'],df['AwayTeam'] ]).unique()
+    names.sort()
+    team_index = TeamIndex(names)
+    dates = df['Date'] if pd.api.types.is_datetime64_any_dtype(df['Date']) else pd.to_datetime(df['Date'])
+    age_in_days = (dates.max() - dates).dt.days.values
+
+    # --- Pre-calculate indices for vectorization (names are sorted, so IDs are positions) ---
+    home_indices = np.searchsorted(names, df['HomeTeam'].values)
+    away_indices = np.searchsorted(names, df['AwayTeam'].values)
+
+    # --- Collapse matches into unique (home, away, home goals, away goals) tuples ---
+    # Rows sharing a tuple only differ in their decay weight, so the weighted
+    # log-likelihood needs each tuple once with the weights summed up.
+    rows = np.column_stack((home_indices, away_indices, df['FTHG'].values, df['FTAG'].values)).astype(np.int64)
+    unique_rows, inverse = np.unique(rows, axis=0, return_inverse=True)
+    home_indices, away_indices, home_goals, away_goals = unique_rows.T
+    return {
+        'team_index': team_index,
+        'home': home_indices,
+        'away': away_indices,
+        'home_goals': home_goals,
+        'away_goals': away_goals,
+        # log(x!) terms of the Poisson pmf don't depend on the parameters
+        'log_factorials': gammaln(home_goals + 1) + gammaln(away_goals + 1),
+        'inverse': inverse.ravel(),
+        'age_in_days': age_in_days,
+    }
+
+
+class _StackedProblem:
+    """
+    K independent Dixon-Coles likelihoods sharing one parameter vector.
+
+    Problem k owns the block [attack (N_k), defense (N_k), home_adv, rho] of
+    the full vector x. One kernel call evaluates all K objectives and the
+    block-separable gradient; `fit_many` drives the blocks with independent
+    optimizer states, `DixonColes.fit` uses K = 1 with scipy's L-BFGS-B.
+
+    With the 'linear' parameterization the constraint sum(attack_k) == N_k is
+    built in: the optimizer works on positive weights u_k and
+    attack_k = N_k * u_k / sum(u_k), which leaves a bound-constrained problem
+    for L-BFGS-B. With 'log' the optimizer works on log strengths v_k with
+    log(attack_k) = v_k - mean(v_k) (sum-to-zero) and no bounds at all; the
+    L2 penalty then applies to the log parameters.
+    """
+
+    def __init__(self, models: List[DixonColes], datas: List[Dict[str, np.ndarray]]):
+        if len({m.parameterization for m in models}) > 1:
+            raise ValueError("All stacked models need the same parameterization")
+        sizes = [len(d['team_index']) for d in datas]
+        offsets = np.concatenate(([0], np.cumsum([2 * n + 2 for n in sizes])))
+        self.size = offsets[-1]
+        self.models = models
+        self.datas = datas
+        self.offsets = offsets
+        self.n_blocks = len(models)
+        # Problem each compressed row / each parameter belongs to
+        self.row_block = np.repeat(np.arange(len(models)), [len(d['home']) for d in datas])
+        self.param_block = np.repeat(np.arange(len(models)), np.diff(offsets))
+
+        # Global parameter positions of every compressed row
+        def stack(f):
+            return np.concatenate([f(off, n, d) for off, n, d in zip(offsets, sizes, datas)])
+        self.attack_home = stack(lambda off, n, d: off + d['home'])
+        self.attack_away = stack(lambda off, n, d: off + d['away'])
+        self.defense_home = stack(lambda off, n, d: off + n + d['home'])
+        self.defense_away = stack(lambda off, n, d: off + n + d['away'])
+        self.home_adv = stack(lambda off, n, d: np.full(len(d['home']), off + 2 * n))
+        self.rho = stack(lambda off, n, d: np.full(len(d['home']), off + 2 * n + 1))
+        self.home_goals = stack(lambda off, n, d: d['home_goals'])
+        self.away_goals = stack(lambda off, n, d: d['away_goals'])
+        self.weights = stack(lambda off, n, d: d['weights'])
+        self.log_factorials = stack(lambda off, n, d: d['log_factorials'])
+        self.reg = np.concatenate([np.full(2 * n + 2, m.regularization_lambda) for m, n in zip(models, sizes)])
+
+        # Attack parameter positions, which problem they belong to and N_k for each
+        is_attack = np.concatenate([np.r_[np.ones(n), np.zeros(n + 2)] for n in sizes]).astype(bool)
+        self.attack = np.flatnonzero(is_attack)
+        self.attack_problem = np.repeat(np.arange(len(models)), sizes)
+        self.attack_n_teams = np.repeat(np.array(sizes, dtype=float), sizes)
+
+        self.log_params = models[0].parameterization == 'log'
+        is_rho = np.zeros(self.size, dtype=bool)
+        is_rho[offsets[1:] - 1] = True
+        self.positive = np.flatnonzero(~is_rho)
+
+    def _problem_mean(self, values: np.ndarray) -> np.ndarray:
+        # Per-problem mean of attack entries, broadcast back to every attack entry
+        return (np.bincount(self.attack_problem, weights=values) / np.bincount(self.attack_problem))[self.attack_problem]
+
+    def log_parameters(self, z: np.ndarray) -> np.ndarray:
+        """Log mode: optimizer variables -> log strengths (attack centered) and rho."""
+        theta = z.copy()
+        theta[self.attack] -= self._problem_mean(z[self.attack])
+        return theta
+
+    def expand(self, z: np.ndarray) -> np.ndarray:
+        """Optimizer variables -> model parameters."""
+        if self.log_params:
+            x = self.log_parameters(z)
+            x[self.positive] = np.exp(x[self.positive])
+            return x
+        # Linear mode: attack rescaled to sum to N_k
+        x = z.copy()
+        u = z[self.attack]
+        u_sums = np.bincount(self.attack_problem, weights=u)[self.attack_problem]
+        x[self.attack] = self.attack_n_teams * u / u_sums
+        return x
+
+    def initial(self) -> np.ndarray:
+        z = np.concatenate([m._initial_params(d['team_index']) for m, d in zip(self.models, self.datas)])
+        if self.log_params:
+            z[self.positive] = np.log(z[self.positive])
+        return z
+
+    def bounds(self) -> List:
+        if self.log_params:
+            return None
+        # Attack, defense, and home_adv must be positive. rho is unbounded.
+        bounds = []
+        for off, end in zip(self.offsets[:-1], self.offsets[1:]):
+            bounds += [(0.0001, None)] * (end - off - 1) + [(None, None)]
+        return bounds
+
+    def objective(self, z: np.ndarray):
+        """Summed negative penalized log-likelihood and its gradient w.r.t. z."""
+        values, grad = self.objective_blocks(z)
+        return values.sum(), grad
+
+    def objective_blocks(self, z: np.ndarray):
+        """Negative penalized log-likelihood of every problem and the gradient w.r.t. z."""
+        if self.log_params:
+            return self._log_objective(z)
+        x = self.expand(z)
+        values, grad = kernels.nll_grad_blocks(
+            x, self.attack_home, self.attack_away, self.defense_home, self.defense_away,
+            self.home_adv, self.rho, self.home_goals, self.away_goals, self.weights,
+            self.log_factorials, self.reg, self.row_block, self.param_block, self.n_blocks,
+        )
+
+        # Chain rule through attack = N * u / sum(u):
+        # d/du_j = N / sum(u) * (d/da_j - sum_i(d/da_i * a_i) / N)
+        u = z[self.attack]
+        grad_attack = grad[self.attack]
+        u_sums = np.bincount(self.attack_problem, weights=u)[self.attack_problem]
+        projected = np.bincount(self.attack_problem, weights=grad_attack * x[self.attack])[self.attack_problem]
+        grad[self.attack] = self.attack_n_teams / u_sums * (grad_attack - projected / self.attack_n_teams)
+        return values, grad
+
+    def _log_objective(self, z: np.ndarray):
+        theta = self.log_parameters(z)
+        x = self.expand(z)
+        # Likelihood only; the penalty is on the log parameters, not on x
+        values, grad = kernels.nll_grad_blocks(
+            x, self.attack_home, self.attack_away, self.defense_home, self.defense_away,
+            self.home_adv, self.rho, self.home_goals, self.away_goals, self.weights,
+            self.log_factorials, np.zeros(self.size), self.row_block, self.param_block, self.n_blocks,
+        )
+        values += np.bincount(self.param_block, weights=self.reg * theta**2, minlength=self.n_blocks)
+
+        # d/dtheta = d/dx * x for the exponentiated entries (everything but rho)
+        grad[self.positive] *= x[self.positive]
+        grad += 2 * self.reg * theta
+        # Chain rule through the centering: d/dv_j = d/dtheta_j - mean(d/dtheta)
+        grad[self.attack] -= self._problem_mean(grad[self.attack])
+        return values, grad
+
+    def to_free(self, z: np.ndarray) -> np.ndarray:
+        """Optimizer variables -> unbounded variables (log of the positive ones in linear mode)."""
+        w = z.copy()
+        if not self.log_params:
+            w[self.positive] = np.log(z[self.positive])
+        return w
+
+    def from_free(self, w: np.ndarray) -> np.ndarray:
+        z = w.copy()
+        if not self.log_params:
+            z[self.positive] = np.exp(w[self.positive])
+        return z
+
+    def free_objective(self, w: np.ndarray):
+        """Per-problem objective and gradient w.r.t. the unbounded variables."""
+        z = self.from_free(w)
+        values, grad = self.objective_blocks(z)
+        if not self.log_params:
+            grad[self.positive] *= z[self.positive]
+        return values, grad
+
+
+def _minimize_blocks(problem: _StackedProblem, maxiter: int = 15000, memory: int = 20,
+                     gtol: float = 1e-7, ftol: float = 1e-13) -> List["optimize.OptimizeResult"]:
+    """
+    L-BFGS on K independent problems in lockstep.
+
+    Every problem keeps its own curvature history, backtracking line search
+    and convergence test; only the objective/gradient evaluation is shared,
+    one stacked kernel call per trial step. Problems stop as soon as they
+    have converged. Works on the unbounded variables of `free_objective`,
+    so linear mode needs no bounds.
+    """
+    from scipy import optimize
+
+    K, block = problem.n_blocks, problem.param_block
+    starts = problem.offsets[:-1]
+
+    def dot(a, b):
+        return np.bincount(block, weights=a * b, minlength=K)
+
+    w = problem.to_free(problem.initial())
+    f, g = problem.free_objective(w)
+    S = np.zeros((memory, len(w)))
+    Y = np.zeros((memory, len(w)))
+    inv_sy = np.zeros((memory, K))  # 0 = no usable pair for that problem
+    gamma = 1 / np.maximum(1, np.sqrt(dot(g, g)))
+    n_pairs = 0
+
+    nit = np.zeros(K, dtype=int)
+    active = np.maximum.reduceat(np.abs(g), starts) > gtol
+    message = np.where(active, "iteration limit reached", "converged (gradient)").astype(object)
+    success = ~active
+
+    for _ in range(maxiter):
+        if not active.any():
+            break
+        # Two-loop recursion, dot products per problem
+        q = g.copy()
+        history = [(n_pairs - 1 - i) % memory for i in range(min(n_pairs, memory))]
+        alphas = []
+        for i in history:
+            alpha = inv_sy[i] * dot(S[i], q)
+            alphas.append(alpha)
+            q -= alpha[block] * Y[i]
+        r = gamma[block] * q
+        for i, alpha in zip(reversed(history), reversed(alphas)):
+            beta = inv_sy[i] * dot(Y[i], r)
+            r += (alpha - beta)[block] * S[i]
+        d = np.where(active[block], -r, 0.0)
+
+        # Restart from steepest descent where the direction is not downhill
+        slope = dot(g, d)
+        restart = active & (slope >= 0)
+        if restart.any():
+            inv_sy[:, restart] = 0
+            d = np.where(restart[block], -gamma[block] * g, d)
+            slope = dot(g, d)
+
+        # Backtracking (Armijo) line search, all problems evaluated together
+        step = np.ones(K)
+        pending = active.copy()
+        w_new, f_new, g_new = w.copy(), f.copy(), g.copy()
+        for _ in range(60):
+            trial = w + step[block] * d
+            f_trial, g_trial = problem.free_objective(trial)
+            accepted = pending & np.isfinite(f_trial) & (f_trial <= f + 1e-4 * step * slope)
+            mask = accepted[block]
+            w_new[mask], g_new[mask], f_new[accepted] = trial[mask], g_trial[mask], f_trial[accepted]
+            pending &= ~accepted
+            if not pending.any():
+                break
+            step[pending] *= 0.5
+        nit[active] += 1
+
+        # New curvature pair, skipped for problems where it is not positive
+        s_k, y_k = w_new - w, g_new - g
+        sy, yy = dot(s_k, y_k), dot(y_k, y_k)
+        usable = active & ~pending & (sy > 1e-10 * np.maximum(yy, 1e-300))
+        slot = n_pairs % memory
+        S[slot], Y[slot] = np.where(usable[block], s_k, 0.0), np.where(usable[block], y_k, 0.0)
+        inv_sy[slot] = np.where(usable, 1 / np.where(usable, sy, 1), 0.0)
+        gamma = np.where(usable, sy / np.where(usable, yy, 1), gamma)
+        n_pairs += 1
+
+        relative_decrease = (f - f_new) / np.maximum(np.maximum(np.abs(f), np.abs(f_new)), 1)
+        w, f, g = w_new, f_new, g_new
+        small_gradient = np.maximum.reduceat(np.abs(g), starts) <= gtol
+
+        done = active & (small_gradient | (relative_decrease <= ftol))
+        message[done & small_gradient] = "converged (gradient)"
+        message[done & ~small_gradient] = "converged (relative reduction of f)"
+        success |= done
+        stalled = active & pending
+        message[stalled] = "line search failed"
+        active &= ~(done | stalled)
+
+    z = problem.from_free(w)
+    return [
+        optimize.OptimizeResult(x=z[off:end], fun=f[k], nit=nit[k], success=bool(success[k]), message=message[k])
+        for k, (off, end) in enumerate(zip(problem.offsets[:-1], problem.offsets[1:]))
+    ]
+
+
+def fit_many(models: List[DixonColes], dfs: List[pd.DataFrame]) -> List["optimize.OptimizeResult"]:
+    """
+    Fit several independent Dixon-Coles models together, e.g. for hyperparameter sweeps.
+
+    All problems are stacked into one vectorized objective and advanced by a
+    lockstep L-BFGS (`_minimize_blocks`): each model has its own line search
+    and convergence test, but every step costs a single kernel call for all
+    of them. Each model ends up with the parameters of `model.fit(df)` on its
+    own, up to optimizer tolerance.
+
+    Args:
+        models: DixonColes instances (each keeps its own alpha/lambda settings)
+        dfs: Training data, one DataFrame per model
+
+    Returns:
+        The optimizer result (iterations, convergence message) of every model
+    """
+    # Sweeps pass the same DataFrame many times; compress each one once
+    compressed = {}
+    for df in dfs:
+        if id(df) not in compressed:
+            compressed[id(df)] = _compress(df)
+    datas = [m._prepare(df, compressed[id(df)]) for m, df in zip(models, dfs)]
+    problem = _StackedProblem(models, datas)
+    results = _minimize_blocks(problem)
+    x = problem.expand(np.concatenate([result.x for result in results]))
+    for model, data, result, off, end in zip(models, datas, results, problem.offsets[:-1], problem.offsets[1:]):
+        if not result.success:
+            print(f"Warning: Optimizer failed to converge ({result.message}).")
+            continue
+        model._set_params(x[off:end], data['team_index'])
+    return results
+
+
+def _fit_single(model: DixonColes, df: pd.DataFrame) -> "optimize.OptimizeResult":
+    """Fit one model with scipy's L-BFGS-B on the bounded variables."""
+    from scipy import optimize
+
+    data = model._prepare(df)
+    problem = _StackedProblem([model], [data])
+    optimize_res: optimize.OptimizeResult = optimize.minimize(
+        problem.objective,
+        problem.initial(),
+        jac=True,
+        method='L-BFGS-B',
+        bounds=problem.bounds(),
+        options={'maxiter': 15000, 'maxcor': 30, 'ftol': 1e-13, 'gtol': 1e-7},
+    )
+
+    if not optimize_res.success:
+        print(f"Warning: Optimizer failed to converge ({optimize_res.message}).")
+        return optimize_res
+    model._set_params(problem.expand(optimize_res.x), data['team_index'])
+    return optimize_res
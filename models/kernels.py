@@ -0,0 +1,261 @@
+"""
+Hot numerical kernels shared by the models.
+
+Every kernel has a pure NumPy implementation and, when Numba is installed,
+a fused JIT-compiled one. The Numba backend is picked automatically; set
+KICKTIPP_BACKEND=numpy (or call `set_backend`) to force the fallback.
+"""
+import os
+from typing import Tuple
+import numpy as np
+
+LOG_FLOOR = np.log(1e-9)
+
+
+# --- NumPy backend ---
+
+def _poisson_pmf_numpy(lam: float, max_goals: int) -> np.ndarray:
+    # P(0) = exp(-lam), P(k) = P(k-1) * lam / k
+    factors = np.empty(max_goals + 1)
+    factors[0] = np.exp(-lam)
+    factors[1:] = lam / np.arange(1, max_goals + 1)
+    return np.cumprod(factors)
+
+
+def score_matrix_numpy(lam_home: float, lam_away: float, rho: float, max_goals: int) -> np.ndarray:
+    """P(home=i, away=j) for i, j in 0..max_goals, with the Dixon-Coles tau correction."""
+    matrix = np.outer(_poisson_pmf_numpy(lam_home, max_goals), _poisson_pmf_numpy(lam_away, max_goals))
+    if rho:
+        matrix[0, 0] *= max(1e-9, 1 - lam_home * lam_away * rho)
+        matrix[1, 0] *= max(1e-9, 1 + lam_away * rho)
+        matrix[0, 1] *= max(1e-9, 1 + lam_home * rho)
+        matrix[1, 1] *= max(1e-9, 1 - rho)
+    return matrix
+
+
+def _nll_terms_numpy(x, attack_home, attack_away, defense_home, defense_away, home_adv, rho_idx,
+                     home_goals, away_goals, weights, log_factorials) -> Tuple[np.ndarray, np.ndarray]:
+    """Weighted log-likelihood of every row and the gradient of minus their sum (no penalty)."""
+    rho = x[rho_idx]
+    lambda_home = x[attack_home] * x[defense_away] * x[home_adv]
+    lambda_away = x[attack_away] * x[defense_home]
+
+    # tau and its partial derivatives (zero wherever tau is clipped)
+    tau = np.ones_like(lambda_home)
+    dtau_home = np.zeros_like(lambda_home)
+    dtau_away = np.zeros_like(lambda_home)
+    dtau_rho = np.zeros_like(lambda_home)
+    m = (home_goals == 0) & (away_goals == 0)
+    tau[m] = 1 - lambda_home[m] * lambda_away[m] * rho[m]
+    dtau_home[m] = -lambda_away[m] * rho[m]
+    dtau_away[m] = -lambda_home[m] * rho[m]
+    dtau_rho[m] = -lambda_home[m] * lambda_away[m]
+    m = (home_goals == 1) & (away_goals == 0)
+    tau[m] = 1 + lambda_away[m] * rho[m]
+    dtau_away[m] = rho[m]
+    dtau_rho[m] = lambda_away[m]
+    m = (home_goals == 0) & (away_goals == 1)
+    tau[m] = 1 + lambda_home[m] * rho[m]
+    dtau_home[m] = rho[m]
+    dtau_rho[m] = lambda_home[m]
+    m = (home_goals == 1) & (away_goals == 1)
+    tau[m] = 1 - rho[m]
+    dtau_rho[m] = -1
+    clipped = tau < 1e-9
+    tau[clipped] = 1e-9
+    dtau_home[clipped] = dtau_away[clipped] = dtau_rho[clipped] = 0
+
+    log_p = np.log(tau) + \
+        home_goals * np.log(lambda_home) - lambda_home + \
+        away_goals * np.log(lambda_away) - lambda_away - log_factorials
+    # log(p + 1e-9), same floor as the original per-row pmf version
+    log_likelihood = np.logaddexp(log_p, LOG_FLOOR)
+
+    # d log_likelihood / d log_p, times the match weights
+    g = weights * np.exp(log_p - log_likelihood)
+    g_home = g * (home_goals / lambda_home - 1 + dtau_home / tau) * lambda_home
+    g_away = g * (away_goals / lambda_away - 1 + dtau_away / tau) * lambda_away
+    g_rho = g * dtau_rho / tau
+
+    # Scatter d(-LL)/dx into the full vector (lambda is a product, so
+    # d lambda / d param = lambda / param)
+    positions = np.concatenate((attack_home, defense_away, home_adv, attack_away, defense_home, rho_idx))
+    values = np.concatenate((g_home / x[attack_home], g_home / x[defense_away], g_home / x[home_adv],
+                             g_away / x[attack_away], g_away / x[defense_home], g_rho))
+    grad = -np.bincount(positions, weights=values, minlength=len(x))
+    return weights * log_likelihood, grad
+
+
+def nll_grad_numpy(x, attack_home, attack_away, defense_home, defense_away, home_adv, rho_idx,
+                   home_goals, away_goals, weights, log_factorials, reg) -> Tuple[float, np.ndarray]:
+    """
+    Penalized negative Dixon-Coles log-likelihood and its gradient.
+
+    `x` is the full parameter vector; the index arrays give, for every
+    (compressed) match row, the positions of its parameters in `x`.
+    """
+    log_likelihood, grad = _nll_terms_numpy(x, attack_home, attack_away, defense_home, defense_away, home_adv,
+                                            rho_idx, home_goals, away_goals, weights, log_factorials)
+    # Penalize the sum of squares of the parameters to prevent them from getting too large
+    value = -np.sum(log_likelihood) + np.sum(reg * x**2)
+    grad += 2 * reg * x
+    return value, grad
+
+
+def nll_grad_blocks_numpy(x, attack_home, attack_away, defense_home, defense_away, home_adv, rho_idx,
+                          home_goals, away_goals, weights, log_factorials, reg,
+                          row_block, param_block, n_blocks) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Same as `nll_grad_numpy`, but returns one objective value per independent
+    problem: row r belongs to problem row_block[r], x[i] to param_block[i].
+    """
+    log_likelihood, grad = _nll_terms_numpy(x, attack_home, attack_away, defense_home, defense_away, home_adv,
+                                            rho_idx, home_goals, away_goals, weights, log_factorials)
+    values = np.bincount(param_block, weights=reg * x**2, minlength=n_blocks) - \
+        np.bincount(row_block, weights=log_likelihood, minlength=n_blocks)
+    grad += 2 * reg * x
+    return values, grad
+
+
+# --- Numba backend ---
+
+def _build_numba_kernels():
+    import numba
+
+    @numba.njit(cache=True)
+    def score_matrix(lam_home, lam_away, rho, max_goals):
+        pmf_home = np.empty(max_goals + 1)
+        pmf_away = np.empty(max_goals + 1)
+        pmf_home[0] = np.exp(-lam_home)
+        pmf_away[0] = np.exp(-lam_away)
+        for k in range(1, max_goals + 1):
+            pmf_home[k] = pmf_home[k - 1] * lam_home / k
+            pmf_away[k] = pmf_away[k - 1] * lam_away / k
+        matrix = np.empty((max_goals + 1, max_goals + 1))
+        for i in range(max_goals + 1):
+            for j in range(max_goals + 1):
+                matrix[i, j] = pmf_home[i] * pmf_away[j]
+        if rho != 0.0:
+            matrix[0, 0] *= max(1e-9, 1 - lam_home * lam_away * rho)
+            matrix[1, 0] *= max(1e-9, 1 + lam_away * rho)
+            matrix[0, 1] *= max(1e-9, 1 + lam_home * rho)
+            matrix[1, 1] *= max(1e-9, 1 - rho)
+        return matrix
+
+    @numba.njit(cache=True)
+    def nll_grad_blocks(x, attack_home, attack_away, defense_home, defense_away, home_adv, rho_idx,
+                        home_goals, away_goals, weights, log_factorials, reg, row_block, param_block, n_blocks):
+        grad = np.zeros(x.shape[0])
+        values = np.zeros(n_blocks)
+        for r in range(home_goals.shape[0]):
+            i = home_goals[r]
+            j = away_goals[r]
+            rho = x[rho_idx[r]]
+            lam_home = x[attack_home[r]] * x[defense_away[r]] * x[home_adv[r]]
+            lam_away = x[attack_away[r]] * x[defense_home[r]]
+
+            tau, dtau_home, dtau_away, dtau_rho = 1.0, 0.0, 0.0, 0.0
+            if i == 0 and j == 0:
+                tau = 1 - lam_home * lam_away * rho
+                dtau_home, dtau_away, dtau_rho = -lam_away * rho, -lam_home * rho, -lam_home * lam_away
+            elif i == 1 and j == 0:
+                tau = 1 + lam_away * rho
+                dtau_away, dtau_rho = rho, lam_away
+            elif i == 0 and j == 1:
+                tau = 1 + lam_home * rho
+                dtau_home, dtau_rho = rho, lam_home
+            elif i == 1 and j == 1:
+                tau = 1 - rho
+                dtau_rho = -1.0
+            if tau < 1e-9:
+                tau, dtau_home, dtau_away, dtau_rho = 1e-9, 0.0, 0.0, 0.0
+
+            log_p = np.log(tau) + i * np.log(lam_home) - lam_home + \
+                j * np.log(lam_away) - lam_away - log_factorials[r]
+            log_likelihood = np.logaddexp(log_p, LOG_FLOOR)
+            values[row_block[r]] -= weights[r] * log_likelihood
+
+            g = weights[r] * np.exp(log_p - log_likelihood)
+            g_home = g * (i / lam_home - 1 + dtau_home / tau) * lam_home
+            g_away = g * (j / lam_away - 1 + dtau_away / tau) * lam_away
+            grad[attack_home[r]] -= g_home / x[attack_home[r]]
+            grad[defense_away[r]] -= g_home / x[defense_away[r]]
+            grad[home_adv[r]] -= g_home / x[home_adv[r]]
+            grad[attack_away[r]] -= g_away / x[attack_away[r]]
+            grad[defense_home[r]] -= g_away / x[defense_home[r]]
+            grad[rho_idx[r]] -= g * dtau_rho / tau
+
+        for k in range(x.shape[0]):
+            values[param_block[k]] += reg[k] * x[k] ** 2
+            grad[k] += 2 * reg[k] * x[k]
+        return values, grad
+
+    @numba.njit(cache=True)
+    def nll_grad(x, attack_home, attack_away, defense_home, defense_away, home_adv, rho_idx,
+                 home_goals, away_goals, weights, log_factorials, reg):
+        values, grad = nll_grad_blocks(
+            x, attack_home, attack_away, defense_home, defense_away, home_adv, rho_idx,
+            home_goals, away_goals, weights, log_factorials, reg,
+            np.zeros(home_goals.shape[0], dtype=np.int64), np.zeros(x.shape[0], dtype=np.int64), 1,
+        )
+        return values[0], grad
+
+    return {'score_matrix': score_matrix, 'nll_grad': nll_grad, 'nll_grad_blocks': nll_grad_blocks}
+
+
+# --- Backend selection ---
+
+_backends = {'numpy': {'score_matrix': score_matrix_numpy, 'nll_grad': nll_grad_numpy,
+                       'nll_grad_blocks': nll_grad_blocks_numpy}}
+_active = None
+
+
+def available_backends() -> list:
+    """Names of the backends usable in this environment."""
+    names = ['numpy']
+    try:
+        import numba  # noqa: F401
+        names.append('numba')
+    except ImportError:
+        pass
+    return names
+
+
+def get_kernels(backend: str = None) -> dict:
+    """Kernels of `backend` (default: the active backend)."""
+    global _active
+    if backend is None:
+        if _active is None:
+            requested = os.getenv("KICKTIPP_BACKEND", "auto")
+            _active = available_backends()[-1] if requested == "auto" else requested
+        backend = _active
+    if backend not in _backends:
+        if backend not in available_backends():
+            raise ValueError(f"Backend '{backend}' not available (have: {', '.join(available_backends())})")
+        _backends[backend] = _build_numba_kernels()
+    return _backends[backend]
+
+
+def set_backend(backend: str) -> None:
+    """Switch all models to `backend` ('numpy' or 'numba')."""
+    global _active
+    get_kernels(backend)
+    _active = backend
+
+
+def score_matrix(lam_home: float, lam_away: float, rho: float, max_goals: int) -> np.ndarray:
+    return get_kernels()['score_matrix'](float(lam_home), float(lam_away), float(rho), int(max_goals))
+
+
+def nll_grad(*args) -> Tuple[float, np.ndarray]:
+    return get_kernels()['nll_grad'](*args)
+
+
+def nll_grad_blocks(*args) -> Tuple[np.ndarray, np.ndarray]:
+    return get_kernels()['nll_grad_blocks'](*args)
+
+
+def most_likely_score(matrix: np.ndarray) -> Tuple[int, int]:
+    """(home, away) goals of the most probable cell (first one on ties)."""
+    i, j = np.unravel_index(np.argmax(matrix), matrix.shape)
+    return int(i), int(j)
@@ -0,0 +1,227 @@
+"""
+Bookmaker odds as features and as a model.
+
+football-data.co.uk ships closing odds of several bookmakers with every
+season file. This module turns them into margin-free probabilities and
+solves, for all matches at once, for the Poisson goal rates
+(lambda_home, lambda_away) the market implies.
+"""
+from typing import List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from models.base import PredictionModel
+from models.kernels import most_likely_score
+
+# Odds columns in order of preference (market average first, then single bookmakers).
+# Older seasons use the BetBrain 'BbAv' names, newer ones 'Avg'.
+RESULT_ODDS = [
+    ('AvgH', 'AvgD', 'AvgA'),
+    ('BbAvH', 'BbAvD', 'BbAvA'),
+    ('PSH', 'PSD', 'PSA'),
+    ('B365H', 'B365D', 'B365A'),
+    ('WHH', 'WHD', 'WHA'),
+]
+TOTAL_ODDS = [
+    ('Avg>2.5', 'Avg<2.5'),
+    ('BbAv>2.5', 'BbAv<2.5'),
+    ('P>2.5', 'P<2.5'),
+    ('B365>2.5', 'B365<2.5'),
+]
+
+FEATURE_COLUMNS = [
+    'ImpliedProbHome', 'ImpliedProbDraw', 'ImpliedProbAway', 'ImpliedProbOver25',
+    'ImpliedHomeGoals', 'ImpliedAwayGoals',
+]
+
+
+def select_odds(df: pd.DataFrame, sources: List[Tuple[str, ...]]) -> np.ndarray:
+    """
+    (n, k) decimal odds, taking each row from the first source that has a full set.
+
+    Rows without any complete set are NaN.
+    """
+    odds = np.full((len(df), len(sources[0])), np.nan)
+    missing = np.ones(len(df), dtype=bool)
+    for columns in sources:
+        if not set(columns).issubset(df.columns):
+            continue
+        values = np.column_stack([pd.to_numeric(df[c], errors='coerce').to_numpy(dtype=float) for c in columns])
+        usable = missing & np.all(values > 1, axis=1)
+        odds[usable] = values[usable]
+        missing &= ~usable
+    return odds
+
+
+def remove_margin(odds: np.ndarray) -> np.ndarray:
+    """Margin-free probabilities from (n, k) decimal odds (inverse odds, normalized per row)."""
+    inverse = 1 / odds
+    return inverse / inverse.sum(axis=1, keepdims=True)
+
+
+def _poisson_pmfs(lam: np.ndarray, max_goals: int) -> np.ndarray:
+    # (n, max_goals + 1) pmf rows, P(k) = P(k-1) * lam / k
+    factors = np.empty((len(lam), max_goals + 1))
+    factors[:, 0] = np.exp(-lam)
+    factors[:, 1:] = lam[:, None] / np.arange(1, max_goals + 1)
+    return np.cumprod(factors, axis=1)
+
+
+def implied_goal_rates(p_home: np.ndarray, p_away: np.ndarray, p_over: Optional[np.ndarray] = None,
+                       max_goals: int = 12, iterations: int = 50, tol: float = 1e-10) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Solve for the independent-Poisson goal rates matching market probabilities.
+
+    Fits log(lambda_home), log(lambda_away) for every match simultaneously
+    with damped Gauss-Newton on the residuals P(home win), P(away win) and,
+    where available, P(over 2.5). Without the over/under market the 1X2
+    probabilities determine both rates on their own.
+
+    Returns:
+        (lambda_home, lambda_away), NaN where the 1X2 probabilities are missing.
+    """
+    p_home = np.asarray(p_home, dtype=float)
+    p_away = np.asarray(p_away, dtype=float)
+    n = len(p_home)
+    if p_over is None:
+        p_over = np.full(n, np.nan)
+    valid = np.isfinite(p_home) & np.isfinite(p_away)
+    has_total = valid & np.isfinite(p_over)
+
+    targets = np.column_stack((p_home, p_away, np.where(has_total, p_over, 0.0)))[valid]
+    residual_weights = np.column_stack((np.ones(n), np.ones(n), has_total.astype(float)))[valid]
+
+    goals = np.arange(max_goals + 1)
+    home_win = goals[:, None] > goals[None, :]
+    away_win = goals[:, None] < goals[None, :]
+    over = (goals[:, None] + goals[None, :]) > 2.5
+    masks = np.stack((home_win, away_win, over)).astype(float)
+
+    # Start from typical league rates
+    u = np.tile(np.log([1.5, 1.2]), (len(targets), 1))
+    for _ in range(iterations):
+        lam = np.exp(u)
+        pmf_home = _poisson_pmfs(lam[:, 0], max_goals)
+        pmf_away = _poisson_pmfs(lam[:, 1], max_goals)
+        # d pmf(k) / d lambda = pmf(k - 1) - pmf(k); times lambda for the log scale
+        dpmf_home = (np.concatenate((np.zeros((len(lam), 1)), pmf_home[:, :-1]), axis=1) - pmf_home) * lam[:, :1]
+        dpmf_away = (np.concatenate((np.zeros((len(lam), 1)), pmf_away[:, :-1]), axis=1) - pmf_away) * lam[:, 1:]
+
+        probs = np.einsum('ni,mij,nj->nm', pmf_home, masks, pmf_away)
+        jacobian = np.stack((
+            np.einsum('ni,mij,nj->nm', dpmf_home, masks, pmf_away),
+            np.einsum('ni,mij,nj->nm', pmf_home, masks, dpmf_away),
+        ), axis=2)
+
+        residuals = (probs - targets) * residual_weights
+        jacobian *= residual_weights[:, :, None]
+        # Levenberg damping keeps the 2x2 normal equations well posed
+        normal = np.einsum('nmi,nmj->nij', jacobian, jacobian) + 1e-9 * np.eye(2)
+        step = np.linalg.solve(normal, -np.einsum('nmi,nm->ni', jacobian, residuals)[:, :, None])[:, :, 0]
+        step = np.clip(step, -1, 1)
+        u += step
+        if np.max(np.abs(step), initial=0) < tol:
+            break
+
+    lambda_home = np.full(n, np.nan)
+    lambda_away = np.full(n, np.nan)
+    lambda_home[valid] = np.exp(u[:, 0])
+    lambda_away[valid] = np.exp(u[:, 1])
+    return lambda_home, lambda_away
+
+
+def add_odds_features(df: pd.DataFrame, max_goals: int = 12) -> pd.DataFrame:
+    """
+    Copy of `df` with market-implied probabilities and goal rates (FEATURE_COLUMNS).
+
+    Rows without usable 1X2 odds get NaN features.
+    """
+    result_probs = remove_margin(select_odds(df, RESULT_ODDS))
+    p_over = remove_margin(select_odds(df, TOTAL_ODDS))[:, 0]
+    lambda_home, lambda_away = implied_goal_rates(result_probs[:, 0], result_probs[:, 2], p_over, max_goals)
+
+    df = df.copy()
+    df['ImpliedProbHome'] = result_probs[:, 0]
+    df['ImpliedProbDraw'] = result_probs[:, 1]
+    df['ImpliedProbAway'] = result_probs[:, 2]
+    df['ImpliedProbOver25'] = p_over
+    df['ImpliedHomeGoals'] = lambda_home
+    df['ImpliedAwayGoals'] = lambda_away
+    return df
+
+
+class OddsModel(PredictionModel):
+    """
+    Team ratings fitted to the goal rates implied by bookmaker odds.
+
+    Upcoming fixtures have no odds in the historical data, so the implied
+    rates of past matches are regressed (time-decayed, ridge least squares) on
+
+        log(lambda_home) = mu + home + attack[home] - defense[away]
+        log(lambda_away) = mu + attack[away] - defense[home]
+
+    and the fitted ratings predict new fixtures like any other model.
+    """
+
+    name = "odds"
+
+    def __init__(self, time_decay_alpha: float = 0.001, regularization_lambda: float = 1.0, max_goals: int = 12):
+        self.time_decay_alpha = time_decay_alpha
+        self.regularization_lambda = regularization_lambda
+        self.max_goals = max_goals
+        self.attack = None
+        self.defense = None
+        self.intercept = None
+        self.home_advantage = None
+
+    def fit(self, df: pd.DataFrame) -> None:
+        from scipy import sparse
+
+        if 'ImpliedHomeGoals' not in df.columns:
+            df = add_odds_features(df, self.max_goals)
+        df = df[np.isfinite(df['ImpliedHomeGoals']) & np.isfinite(df['ImpliedAwayGoals'])]
+        if df.empty:
+            raise ValueError("No matches with usable bookmaker odds in the training data")
+
+        names = np.unique(np.concatenate((df['HomeTeam'].values, df['AwayTeam'].values)))
+        self._build_team_index(names)
+        n_teams = len(names)
+        home_ids = np.array(self.team_index.ids(df['HomeTeam']))
+        away_ids = np.array(self.team_index.ids(df['AwayTeam']))
+
+        age_in_days = (df['Date'].max() - df['Date']).dt.days.values
+        weight = np.exp(-self.time_decay_alpha * age_in_days)
+
+        # Two observations per match, rows 2k (home goals) and 2k + 1 (away goals).
+        # Columns: mu, home, attack[0..T), defense[0..T)
+        n = len(df)
+        rows = np.repeat(np.arange(2 * n), np.tile([4, 3], n))
+        cols = np.column_stack((
+            np.zeros(n, dtype=int), np.ones(n, dtype=int), 2 + home_ids, 2 + n_teams + away_ids,
+            np.zeros(n, dtype=int), 2 + away_ids, 2 + n_teams + home_ids,
+        )).ravel()
+        data = np.tile([1.0, 1.0, 1.0, -1.0, 1.0, 1.0, -1.0], n)
+        design = sparse.csr_matrix((data, (rows, cols)), shape=(2 * n, 2 + 2 * n_teams))
+
+        target = np.log(np.column_stack((df['ImpliedHomeGoals'], df['ImpliedAwayGoals'])).ravel())
+        w = np.repeat(weight, 2)
+        weighted = design.multiply(w[:, None]).tocsr()
+        normal = (design.T @ weighted).toarray()
+        # Ridge on team ratings only; also pins down the attack/defense offsets
+        normal[2:, 2:] += self.regularization_lambda * np.eye(2 * n_teams)
+        params = np.linalg.solve(normal, weighted.T @ target)
+
+        self.intercept = params[0]
+        self.home_advantage = params[1]
+        self.attack = params[2:2 + n_teams]
+        self.defense = params[2 + n_teams:]
+
+    def expected_goals(self, home_team: str, away_team: str) -> Tuple[float, float]:
+        home = self._team_id(home_team)
+        away = self._team_id(away_team)
+        lam_home = np.exp(self.intercept + self.home_advantage + self.attack[home] - self.defense[away])
+        lam_away = np.exp(self.intercept + self.attack[away] - self.defense[home])
+        return lam_home, lam_away
+
+    def predict(self, home_team: str, away_team: str) -> Tuple[int, int]:
+        """Predict most likely score for a match."""
+        return most_likely_score(self.score_matrix(home_team, away_team))
@@ -1,29 +1,15 @@
 import pandas as pd
 import numpy as np
-from scipy.stats import poisson
 from models.base import PredictionModel
+from models.kernels import most_likely_score
 
-# Kicktipp -> football-data.co.uk name mapping
-NAME_MAP = {
-    "FC Bayern München": "Bayern Munich",
-    "FSV Mainz 05": "Mainz",
-    "Bor. Mönchengladbach": "M'gladbach",
-    "1. FC Köln": "FC Koln",
-    "Eintracht Frankfurt": "Ein Frankfurt",
-    "VfB Stuttgart": "Stuttgart",
-    "Werder Bremen": "Werder Bremen",
-    "SC Freiburg": "Freiburg",
-    "RB Leipzig": "RB Leipzig",
-    "Hamburger SV": "Hamburg",
-    "Bayer 04 Leverkusen": "Leverkusen",
-    "1. FC Union Berlin": "Union Berlin",
-    "VfL Wolfsburg": "Wolfsburg",
-    "FC St. Pauli": "St Pauli",
-    "1. FC Heidenheim 1846": "Heidenheim",
-    "1899 Hoffenheim": "Hoffenheim",
-    "Borussia Dortmund": "Dortmund",
-    "FC Augsburg": "Augsburg",
-}
+# Fitted per-team strengths, one row per team ID
+STRENGTH_DTYPE = np.dtype([
+    ('AttackStrengthHome', 'f8'),
+    ('AttackStrengthAway', 'f8'),
+    ('DefenseStrengthHome', 'f8'),
+    ('DefenseStrengthAway', 'f8'),
+])
 
 class PoissonModel(PredictionModel):
     """Poisson-based prediction using attack/defense strengths."""
@@ -33,92 +19,80 @@ class PoissonModel(PredictionModel):
     def __init__(self, shrinkage_k: float = 1.5, max_goals: int = 12, time_decay_alpha:float = 0.001):
         self.k = shrinkage_k
         self.max_goals = max_goals
-        self.teams = None
+        self.strengths = None
         self.avg_home = None
         self.avg_away = None
         self.time_decay_alpha = time_decay_alpha
     
     def fit(self, df: pd.DataFrame) -> None:
         """Compute team strengths from historical match data."""
-        #avoid error because we add age_in_days 
-        df = df.copy()
-        most_recent_date =df['Date'].max()
-        #create new field age_in_days for decay
-        df['age_in_days'] = (most_recent_date - df['Date']).dt.days
-        #apply decay 
-        df['weight'] = np.exp(-self.time_decay_alpha* df['age_in_days'])
-        #weighted goals
-        df['wFTHG'] = df['FTHG'] * df['weight']
-        df['wFTAG'] = df['FTAG'] * df['weight']
+        names = np.unique(np.concatenate((df['HomeTeam'].values, df['AwayTeam'].values)))
+        self._build_team_index(names)
+        n = len(names)
+        home_ids = np.array(self.team_index.ids(df['HomeTeam']))
+        away_ids = np.array(self.team_index.ids(df['AwayTeam']))
+
+        # Time decay weights
+        age_in_days = (df['Date'].max() - df['Date']).dt.days.values
+        weight = np.exp(-self.time_decay_alpha * age_in_days)
+        # Weighted goals
+        w_home_goals = df['FTHG'].values * weight
+        w_away_goals = df['FTAG'].values * weight
+
+        # Aggregate goals and games per team ID
+        HGF = np.bincount(home_ids, weights=w_home_goals, minlength=n)
+        HGA = np.bincount(home_ids, weights=w_away_goals, minlength=n)
+        HG = np.bincount(home_ids, weights=weight, minlength=n)
+        AGF = np.bincount(away_ids, weights=w_away_goals, minlength=n)
+        AGA = np.bincount(away_ids, weights=w_home_goals, minlength=n)
+        AG = np.bincount(away_ids, weights=weight, minlength=n)
+        G = HG + AG
 
-        # Aggregate goals and games
-        home = df.groupby('HomeTeam').agg(
-            HGF=('wFTHG', 'sum'), HGA=('wFTAG', 'sum'), HG=('weight', 'sum')
-        )
-        away = df.groupby('AwayTeam').agg(
-            AGF=('wFTAG', 'sum'), AGA=('wFTHG', 'sum'), AG=('weight', 'sum')
-        )
-        teams = home.join(away, how='outer').fillna(0)
-        teams['GF'] = teams['HGF'] + teams['AGF']
-        teams['GA'] = teams['HGA'] + teams['AGA']
-        teams['G'] = teams['HG'] + teams['AG']
-        
         # League baselines
-        total_weight = df['weight'].sum()
-        self.avg_home = df['wFTHG'].sum()/total_weight
-        self.avg_away = df['wFTAG'].sum()/total_weight
-        
-        # Rates
-        teams['rate_overall_scored'] = teams['GF'] / teams['G']
-        teams['rate_overall_conceded'] = teams['GA'] / teams['G']
-        teams['rate_home_scored'] = teams['HGF'] / teams['HG'].replace(0, np.nan)
-        teams['rate_home_conceded'] = teams['HGA'] / teams['HG'].replace(0, np.nan)
-        teams['rate_away_scored'] = teams['AGF'] / teams['AG'].replace(0, np.nan)
-        teams['rate_away_conceded'] = teams['AGA'] / teams['AG'].replace(0, np.nan)
-        
+        total_weight = weight.sum()
+        self.avg_home = w_home_goals.sum() / total_weight
+        self.avg_away = w_away_goals.sum() / total_weight
+
+        # Rates (NaN for teams without home or away games)
+        def rate(goals, games):
+            return np.divide(goals, games, out=np.full(n, np.nan), where=games > 0)
+
+        rate_overall_scored = (HGF + AGF) / G
+        rate_overall_conceded = (HGA + AGA) / G
+
         # Shrinkage
         k = self.k
-        teams['attack_home'] = (
-            (teams['rate_home_scored'] * teams['HG']) + (k * teams['rate_overall_scored'])
-        ) / (teams['HG'] + k)
-        teams['attack_away'] = (
-            (teams['rate_away_scored'] * teams['AG']) + (k * teams['rate_overall_scored'])
-        ) / (teams['AG'] + k)
-        teams['defense_home'] = (
-            (teams['rate_home_conceded'] * teams['HG']) + (k * teams['rate_overall_conceded'])
-        ) / (teams['HG'] + k)
-        teams['defense_away'] = (
-            (teams['rate_away_conceded'] * teams['AG']) + (k * teams['rate_overall_conceded'])
-        ) / (teams['AG'] + k)
-        
-        # Strengths relative to league
-        teams['AttackStrengthHome'] = teams['attack_home'] / self.avg_home
-        teams['AttackStrengthAway'] = teams['attack_away'] / self.avg_away
-        teams['DefenseStrengthHome'] = self.avg_away / teams['defense_home']
-        teams['DefenseStrengthAway'] = self.avg_home / teams['defense_away']
+        attack_home = (rate(HGF, HG) * HG + k * rate_overall_scored) / (HG + k)
+        attack_away = (rate(AGF, AG) * AG + k * rate_overall_scored) / (AG + k)
+        defense_home = (rate(HGA, HG) * HG + k * rate_overall_conceded) / (HG + k)
+        defense_away = (rate(AGA, AG) * AG + k * rate_overall_conceded) / (AG + k)
+
+        # Strengths relative to league (inf for teams that have not conceded
+        # yet, NaN without games, silently as with the old pandas division)
+        strengths = np.empty(n, dtype=STRENGTH_DTYPE)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            strengths['AttackStrengthHome'] = attack_home / self.avg_home
+            strengths['AttackStrengthAway'] = attack_away / self.avg_away
+            strengths['DefenseStrengthHome'] = self.avg_away / defense_home
+            strengths['DefenseStrengthAway'] = self.avg_home / defense_away
+        self.strengths = strengths
+
+    @property
+    def teams(self) -> pd.DataFrame:
+        """Fitted strengths as a DataFrame indexed by team name (built on demand for inspection)."""
+        if self.strengths is None:
+            return None
+        return pd.DataFrame(self.strengths, index=pd.Index(self.team_index.names, name='Team'))
+
+    def expected_goals(self, home_team: str, away_team: str) -> tuple[float, float]:
+        home = self.strengths[self._team_id(home_team)]
+        away = self.strengths[self._team_id(away_team)]
         
-        self.teams = teams
-    
-    
+        with np.errstate(divide='ignore', invalid='ignore'):
+            lam_home = home['AttackStrengthHome'] * (1 / away['DefenseStrengthAway']) * self.avg_home
+            lam_away = away['AttackStrengthAway'] * (1 / home['DefenseStrengthHome']) * self.avg_away
+        return lam_home, lam_away
+
     def predict(self, home_team: str, away_team: str) -> tuple[int, int]:
         """Predict most likely score for a match."""
-        h = self._normalize_team(home_team)
-        a = self._normalize_team(away_team)
-        
-        ha = self.teams.loc[h, 'AttackStrengthHome']
-        hd = self.teams.loc[h, 'DefenseStrengthHome']
-        aa = self.teams.loc[a, 'AttackStrengthAway']
-        ad = self.teams.loc[a, 'DefenseStrengthAway']
-        
-        lam_home = ha * (1 / ad) * self.avg_home
-        lam_away = aa * (1 / hd) * self.avg_away
-        
-        best = (0, 0)
-        best_p = 0.0
-        for i in range(self.max_goals + 1):
-            for j in range(self.max_goals + 1):
-                p = poisson.pmf(i, lam_home) * poisson.pmf(j, lam_away)
-                if p > best_p:
-                    best_p = p
-                    best = (i, j)
-        return best
\ No newline at end of file
+        return most_likely_score(self.score_matrix(home_team, away_team))
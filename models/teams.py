@@ -0,0 +1,106 @@
+import re
+import unicodedata
+from typing import Dict, Iterable, List
+
+# Kicktipp -> football-data.co.uk name mapping
+NAME_MAP = {
+    "FC Bayern München": "Bayern Munich",
+    "FSV Mainz 05": "Mainz",
+    "Bor. Mönchengladbach": "M'gladbach",
+    "1. FC Köln": "FC Koln",
+    "Eintracht Frankfurt": "Ein Frankfurt",
+    "VfB Stuttgart": "Stuttgart",
+    "Werder Bremen": "Werder Bremen",
+    "SC Freiburg": "Freiburg",
+    "RB Leipzig": "RB Leipzig",
+    "Hamburger SV": "Hamburg",
+    "Bayer 04 Leverkusen": "Leverkusen",
+    "1. FC Union Berlin": "Union Berlin",
+    "VfL Wolfsburg": "Wolfsburg",
+    "FC St. Pauli": "St Pauli",
+    "1. FC Heidenheim 1846": "Heidenheim",
+    "1899 Hoffenheim": "Hoffenheim",
+    "Borussia Dortmund": "Dortmund",
+    "FC Augsburg": "Augsburg",
+}
+
+_STRIP_CHARS = re.compile(r"[.']")
+
+
+def fold_name(name: str) -> str:
+    """Strip accents, dots and apostrophes: 'Bor. Mönchengladbach' -> 'Bor Monchengladbach'."""
+    s = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii')
+    return _STRIP_CHARS.sub("", s).strip()
+
+
+def register_aliases(aliases: Dict[str, str]) -> None:
+    """Add alias -> football-data name entries used by every TeamIndex built afterwards."""
+    NAME_MAP.update(aliases)
+
+
+def load_alias_file(path: str) -> None:
+    """
+    Register aliases from a YAML file, e.g. for other leagues.
+
+    The file maps alias to football-data.co.uk name, same as NAME_MAP:
+
+        "Real Madrid CF": "Real Madrid"
+        "Paris Saint-Germain": "Paris SG"
+    """
+    import yaml
+
+    with open(path, "r", encoding="utf-8") as f:
+        register_aliases(yaml.safe_load(f) or {})
+
+
+class TeamIndex:
+    """
+    Resolves any known spelling of a team to a dense integer ID.
+
+    Built once per fit from the team names in the training data. IDs follow
+    the order of `names`, so models can use them directly as array positions.
+    """
+
+    def __init__(self, names: Iterable[str]):
+        self.names: List[str] = list(names)
+        self._ids: Dict[str, int] = {}
+        for i, name in enumerate(self.names):
+            self._ids[name] = i
+        for i, name in enumerate(self.names):
+            self._ids.setdefault(fold_name(name), i)
+        for alias, target in NAME_MAP.items():
+            i = self._ids.get(target)
+            if i is None:
+                i = self._ids.get(fold_name(target))
+            if i is not None:
+                self._ids.setdefault(alias, i)
+                self._ids.setdefault(fold_name(alias), i)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        try:
+            self.id(name)
+        except KeyError:
+            return False
+        return True
+
+    def id(self, name: str) -> int:
+        """Integer ID for a team name; raises KeyError for unknown teams."""
+        i = self._ids.get(name)
+        if i is None:
+            i = self._ids.get(fold_name(name))
+            if i is None:
+                raise KeyError(f"Team not found: {name}")
+            # Remember the spelling so the next lookup is a plain dict hit
+            self._ids[name] = i
+        return i
+
+    def ids(self, names: Iterable[str]) -> List[int]:
+        """Integer IDs for many team names at once."""
+        return [self.id(name) for name in names]
+
+    def name(self, name: str) -> str:
+        """Football-data.co.uk name for any known spelling."""
+        return self.names[self.id(name)]
@@ -1,10 +1,17 @@
-import requests
 import os
-from bs4 import BeautifulSoup
-from dotenv import load_dotenv
+from typing import TYPE_CHECKING
 
-def create_session() -> requests.Session:
+if TYPE_CHECKING:
+    import requests
+
+BASE_URL = "https://www.kicktipp.de"
+
+def create_session(base_url: str = BASE_URL) -> "requests.Session":
     """Create an authenticated Kicktipp session."""
+    import requests
+    from bs4 import BeautifulSoup
+    from dotenv import load_dotenv
+
     load_dotenv()
     
     password = os.getenv("KICKTIPP_PASSWORD")
@@ -15,14 +22,14 @@ def create_session() -> requests.Session:
     
     headers = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)',
-        'Origin': 'https://www.kicktipp.de',
-        'Referer': 'https://www.kicktipp.de/info/profil/login',
+        'Origin': base_url,
+        'Referer': f'{base_url}/info/profil/login',
     }
     
     s = requests.Session()
     s.headers.update(headers)
     
-    login_url = "https://www.kicktipp.de/info/profil/login"
+    login_url = f"{base_url}/info/profil/login"
     resp = s.get(login_url)
     soup = BeautifulSoup(resp.text, 'html.parser')
     
@@ -30,7 +37,7 @@ def create_session() -> requests.Session:
     if not form:
         raise RuntimeError("Login form not found")
     
-    post_url = "https://www.kicktipp.de" + form.get("action")
+    post_url = base_url + form.get("action")
     resp = s.post(post_url, data={
         "kennung": email,
         "passwort": password,
@@ -1,66 +1,244 @@
-import pandas as pd
 import argparse
-from tqdm import tqdm
+import csv
+import os
+import pickle
+from typing import Dict, Optional, TYPE_CHECKING
 from src.data import load_bundesliga_data
 from src.kicktipp_scoring import get_kicktipp_points
-from models.dixon_coles import DixonColes
-from models.poisson import PoissonModel
+from models import get_model_class
 
-# Register all models/strategies you want to test
-STRATEGIES = {
-    #"poisson": PoissonModel,
-    "dixonColes": DixonColes
-}
+if TYPE_CHECKING:
+    import pandas as pd
 
-def run_backtest(strategy_name: str, df: pd.DataFrame, min_train_size: int = 45):
+# Register all models/strategies you want to test (keys from models.MODELS)
+STRATEGIES = [
+    #"poisson",
+    "dixonColes",
+]
+
+RESULT_COLUMNS = ['date', 'home_team', 'away_team', 'prediction', 'actual', 'points', 'p_home', 'p_draw', 'p_away']
+
+
+class BacktestStats:
+    """
+    Running summary of a backtest.
+
+    Points are updated one prediction at a time; probabilistic scores (RPS,
+    log-loss, Brier, expected points, calibration) are accumulated from
+    batches of score matrices, so memory stays constant however long the run.
+    """
+
+    def __init__(self, calibration_bins: int = 10):
+        import numpy as np
+
+        self.matches = 0
+        self.total_points = 0
+        self.points_counts: Dict[int, int] = {0: 0, 2: 0, 3: 0, 4: 0}
+        # Sums over all matches that have a score matrix
+        self.scored_matches = 0
+        self.metric_sums: Dict[str, float] = {
+            'rps': 0.0, 'log_loss': 0.0, 'score_log_loss': 0.0, 'brier': 0.0, 'expected_points': 0.0,
+        }
+        self.calibration = np.zeros((3, calibration_bins, 3))
+
+    def update(self, points: int) -> None:
+        self.matches += 1
+        self.total_points += points
+        self.points_counts[points] += 1
+
+    def update_probabilities(self, matrices, home_goals, away_goals, tip_home, tip_away):
+        """
+        Accumulate probabilistic scores for a batch of predictions.
+
+        Returns:
+            (n, 3) home/draw/away probabilities of the batch.
+        """
+        from src import metrics
+
+        probs = metrics.outcome_probabilities(matrices)
+        actual = metrics.outcomes(home_goals, away_goals)
+        self.scored_matches += len(actual)
+        self.metric_sums['rps'] += metrics.ranked_probability_score(probs, actual).sum()
+        self.metric_sums['log_loss'] += metrics.log_loss(probs, actual).sum()
+        self.metric_sums['score_log_loss'] += metrics.score_log_loss(matrices, home_goals, away_goals).sum()
+        self.metric_sums['brier'] += metrics.brier_score(probs, actual).sum()
+        self.metric_sums['expected_points'] += metrics.expected_points(matrices, tip_home, tip_away).sum()
+        self.calibration += metrics.calibration_counts(probs, actual, self.calibration.shape[1])
+        return probs
+
+    @property
+    def avg_points(self) -> float:
+        return self.total_points / self.matches if self.matches else 0.0
+
+    def distribution(self) -> Dict[int, float]:
+        """Share of predictions per points value."""
+        return {p: c / self.matches for p, c in self.points_counts.items() if c} if self.matches else {}
+
+    def metrics(self) -> Dict[str, float]:
+        """Mean RPS, log-loss (outcome and exact score), Brier score and expected points per match."""
+        if not self.scored_matches:
+            return {}
+        return {name: float(total / self.scored_matches) for name, total in self.metric_sums.items()}
+
+    def calibration_table(self):
+        """Rows of (outcome, bin range, predictions, mean predicted, observed frequency)."""
+        bins = self.calibration.shape[1]
+        rows = []
+        for outcome, label in enumerate(['home', 'draw', 'away']):
+            for b in range(bins):
+                count, predicted, observed = self.calibration[outcome, b]
+                if count:
+                    rows.append((label, f"{b / bins:.1f}-{(b + 1) / bins:.1f}", int(count), float(predicted / count), float(observed / count)))
+        return rows
+
+
+def _save_checkpoint(path: str, state: Dict) -> None:
+    # Write to a temp file first so a crash never leaves a half-written checkpoint
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _load_checkpoint(checkpoint_path: str, output_path: str, strategy_name: str, min_train_size: int) -> Optional[Dict]:
+    """Checkpoint state if it belongs to this run and its results file is intact, else None."""
+    if not os.path.exists(checkpoint_path):
+        return None
+    try:
+        with open(checkpoint_path, "rb") as f:
+            state = pickle.load(f)
+    except (pickle.UnpicklingError, EOFError, AttributeError) as e:
+        print(f"⚠️ Ignoring unreadable checkpoint {checkpoint_path} ({e}), starting fresh")
+        return None
+
+    if (state.get('strategy'), state.get('min_train_size')) != (strategy_name, min_train_size):
+        print(f"⚠️ Checkpoint {checkpoint_path} is for {state.get('strategy')} with min_train_size="
+              f"{state.get('min_train_size')}, starting fresh")
+        return None
+    if not os.path.exists(output_path) or os.path.getsize(output_path) < state['results_offset']:
+        print(f"⚠️ Results file {output_path} is missing or shorter than the checkpoint, starting fresh")
+        return None
+    return state
+
+
+def run_backtest(
+    strategy_name: str,
+    df: "pd.DataFrame",
+    output_path: str,
+    min_train_size: int = 45,
+    checkpoint_every: int = 1,
+    resume: bool = True,
+) -> BacktestStats:
     """
     Runs a backtest for a given strategy on a historical dataframe.
     Uses an expanding window to train the model and predict chronologically.
+
+    The model is refit once per matchday on all games played before it.
+    Per-match results are appended to `output_path` (CSV, one row per
+    prediction) as they are produced, and every `checkpoint_every` matchdays
+    the model and summary statistics are checkpointed to `output_path + ".ckpt"`.
+    With `resume`, an interrupted run continues after the last checkpointed
+    matchday.
+
+    Returns:
+        BacktestStats summarising all predictions (including resumed ones).
     """
-    results = []
+    import numpy as np
+    from tqdm import tqdm
+
+    checkpoint_path = output_path + ".ckpt"
     
     # Sort by date to ensure order
     df = df.sort_values('Date').reset_index(drop=True)
+    dates = df['Date'].values
     
-    # Iterate through each match day, starting after the initial training period
-    for i in tqdm(range(min_train_size, len(df)), desc=f"Backtesting {strategy_name}"):
-        # Train on all data *before* the current game
-        train_df = df.iloc[:i]
-        
-        # The game to predict
-        test_game = df.iloc[i]
-        
-        # Initialize and fit the model on the training data
-        model = STRATEGIES[strategy_name]()
-        model.fit(train_df)
-        
-        # Predict the score
-        home_team = test_game['HomeTeam']
-        away_team = test_game['AwayTeam']
-        
-        try:
-            pred_home, pred_away = model.predict(home_team, away_team)
+    # Matchdays start after the initial training period
+    matchdays = [d for d in sorted(set(dates[min_train_size:])) if dates.searchsorted(d) >= min_train_size]
+    
+    state = _load_checkpoint(checkpoint_path, output_path, strategy_name, min_train_size) if resume else None
+    if state is not None:
+        model, stats = state['model'], state['stats']
+        matchdays = [d for d in matchdays if d > state['last_date']]
+        # Drop rows written after the checkpoint, they will be recomputed
+        with open(output_path, "r+", newline="") as f:
+            f.truncate(state['results_offset'])
+        print(f"Resuming {strategy_name} backtest after {str(state['last_date'])[:10]} ({stats.matches} matches done)")
+    else:
+        model, stats = get_model_class(strategy_name)(), BacktestStats()
+        with open(output_path, "w", newline="") as f:
+            csv.writer(f).writerow(RESULT_COLUMNS)
+    
+    # One preallocated buffer for the score matrices of a matchday
+    max_goals = getattr(model, 'max_goals', 12)
+    matchday_size = int(np.unique(dates, return_counts=True)[1].max())
+    matrices = np.empty((matchday_size, max_goals + 1, max_goals + 1))
+    has_matrices = True
+    
+    with open(output_path, "a", newline="") as out:
+        writer = csv.writer(out)
+        for n, date in enumerate(tqdm(matchdays, desc=f"Backtesting {strategy_name}"), start=1):
+            start = dates.searchsorted(date, side='left')
+            end = dates.searchsorted(date, side='right')
+            
+            # Train on all games *before* the current matchday. Reusing the
+            # instance lets models warm-start from the previous fit.
+            model.fit(df.iloc[:start])
             
-            # Get actual score
-            actual_home = int(test_game['FTHG'])
-            actual_away = int(test_game['FTAG'])
+            rows = []
+            goals = np.empty((end - start, 4), dtype=int)  # actual home/away, tip home/away
+            for test_game in df.iloc[start:end].itertuples(index=False):
+                try:
+                    pred_home, pred_away = model.predict(test_game.HomeTeam, test_game.AwayTeam)
+                    if has_matrices:
+                        matrices[len(rows)] = model.score_matrix(test_game.HomeTeam, test_game.AwayTeam)
+                except KeyError:
+                    # Handle cases where a team might not be in the training set yet
+                    continue
+                except NotImplementedError:
+                    # Model only predicts scores, skip the probabilistic metrics
+                    has_matrices = False
+                
+                # Get actual score
+                actual_home = int(test_game.FTHG)
+                actual_away = int(test_game.FTAG)
+                goals[len(rows)] = (actual_home, actual_away, pred_home, pred_away)
+                
+                # Calculate points
+                points = get_kicktipp_points(pred_home, pred_away, actual_home, actual_away)
+                stats.update(points)
+                rows.append([
+                    test_game.Date.date(),
+                    test_game.HomeTeam,
+                    test_game.AwayTeam,
+                    f"{pred_home}-{pred_away}",
+                    f"{actual_home}-{actual_away}",
+                    points,
+                ])
             
-            # Calculate points
-            points = get_kicktipp_points(pred_home, pred_away, actual_home, actual_away)
+            if has_matrices and rows:
+                # Teams without enough history can give undefined (NaN) matrices
+                valid = np.isfinite(matrices[:len(rows)]).all(axis=(1, 2))
+                probs = stats.update_probabilities(matrices[:len(rows)][valid], *goals[:len(rows)][valid].T)
+                probs = iter(probs)
+                rows = [row + ([f"{p:.4f}" for p in next(probs)] if ok else []) for row, ok in zip(rows, valid)]
+            # Rows without probabilities get empty fields so every row matches the header
+            writer.writerows(row + [""] * (len(RESULT_COLUMNS) - len(row)) for row in rows)
             
-            results.append({
-                'date': test_game['Date'],
-                'home_team': home_team,
-                'away_team': away_team,
-                'prediction': f"{pred_home}-{pred_away}",
-                'actual': f"{actual_home}-{actual_away}",
-                'points': points
-            })
-        except KeyError as e:
-            # Handle cases where a team might not be in the training set yet
-            pass
+            if n % checkpoint_every == 0 or n == len(matchdays):
+                out.flush()
+                os.fsync(out.fileno())
+                _save_checkpoint(checkpoint_path, {
+                    'strategy': strategy_name,
+                    'min_train_size': min_train_size,
+                    'last_date': date,
+                    'results_offset': out.tell(),
+                    'model': model,
+                    'stats': stats,
+                })
             
-    return pd.DataFrame(results)
+    return stats
 
 
 def main():
@@ -71,6 +249,17 @@ def main():
         default="2526", 
         help="The season to backtest on (e.g., '2425')."
     )
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        default="backtests",
+        help="Where to write per-match results and checkpoints."
+    )
+    parser.add_argument(
+        "--fresh",
+        action="store_true",
+        help="Ignore existing checkpoints and start over."
+    )
     args = parser.parse_args()
 
     print(f"Loading data for season {args.season}...")
@@ -80,23 +269,31 @@ def main():
     #prev2_season = str(int(prev_season) - 101) # '2526' -> '2425'
     
     df = load_bundesliga_data(seasons=[prev_season, args.season])
+    os.makedirs(args.output_dir, exist_ok=True)
     
     print("\n" + "="*50)
     print(f"BACKTEST RESULTS FOR SEASON {args.season}")
     print("="*50)
     
     all_results = {}
-    for name in STRATEGIES.keys():
-        result_df = run_backtest(name, df.copy())
-        total_points = result_df['points'].sum()
-        avg_points = result_df['points'].mean()
-        all_results[name] = total_points
+    for name in STRATEGIES:
+        output_path = os.path.join(args.output_dir, f"{name}_{args.season}.csv")
+        stats = run_backtest(name, df, output_path, resume=not args.fresh)
+        all_results[name] = stats.total_points
         
         print(f"\nStrategy: {name}")
-        print(f"  - Total Points: {total_points}")
-        print(f"  - Avg Points/Game: {avg_points:.2f}")
+        print(f"  - Total Points: {stats.total_points}")
+        print(f"  - Avg Points/Game: {stats.avg_points:.2f}")
         print("  - Points Distribution:")
-        print(result_df['points'].value_counts(normalize=True).sort_index().to_string())
+        for points, share in stats.distribution().items():
+            print(f"    {points}: {share:.3f}")
+        for metric, value in stats.metrics().items():
+            print(f"  - {metric}: {value:.4f}")
+        if stats.scored_matches:
+            print("  - Calibration (outcome, predicted range, n, mean predicted, observed):")
+            for label, bin_range, count, predicted, observed in stats.calibration_table():
+                print(f"    {label:>4} {bin_range}  n={count:<4} {predicted:.3f} -> {observed:.3f}")
+        print(f"  - Results: {output_path}")
 
     print("\n" + "="*50)
     print("SUMMARY")
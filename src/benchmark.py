@@ -0,0 +1,240 @@
+import argparse
+import subprocess
+import sys
+import time
+from typing import List, Tuple
+
+# Entry points whose import cost we care about
+STARTUP_MODULES = ["main", "src.backtest"]
+
+
+def measure_import_time(module: str) -> List[Tuple[str, int]]:
+    """
+    Import `module` in a fresh interpreter with `-X importtime`.
+
+    Returns:
+        List of (module name, cumulative microseconds) for `module` and every
+        module it pulled in, heaviest first.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        # Format: "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = len(name) - len(name.lstrip())
+        rows.append((name.strip(), int(cumulative), depth))
+
+    # Output is post-order: the module's own line comes right after its
+    # (more deeply indented) dependencies. Skip interpreter startup imports.
+    end = next(i for i, row in enumerate(rows) if row[0] == module and row[2] == 1)
+    start = end
+    while start > 0 and rows[start - 1][2] > 1:
+        start -= 1
+    timings = [(name, cumulative) for name, cumulative, _ in rows[start:end + 1]]
+    return sorted(timings, key=lambda t: t[1], reverse=True)
+
+
+def measure_wall_time(args: List[str], repeat: int = 3) -> float:
+    """Best-of-`repeat` wall time in seconds for running a Python command."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], capture_output=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_startup(top: int = 10):
+    print("=" * 50)
+    print("STARTUP (python -X importtime)")
+    print("=" * 50)
+    for module in STARTUP_MODULES:
+        timings = measure_import_time(module)
+        print(f"\n{module}: {timings[0][1] / 1000:.1f} ms")
+        for name, cumulative in timings[1:top + 1]:
+            print(f"   {cumulative / 1000:8.1f} ms  {name}")
+
+    print(f"\nmain.py --help: {measure_wall_time(['main.py', '--help']) * 1000:.0f} ms wall")
+
+
+def _synthetic_matches(n_teams: int, n_matches: int, seed: int = 0):
+    """Random fixtures with Poisson scores, as a DataFrame like load_bundesliga_data returns."""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    strength = rng.normal(0, 0.3, size=(n_teams, 2))
+    home = rng.integers(0, n_teams, n_matches)
+    away = (home + rng.integers(1, n_teams, n_matches)) % n_teams
+    return pd.DataFrame({
+        'Date': pd.Timestamp("2020-08-01") + pd.to_timedelta(np.sort(rng.integers(0, 5 * 365, n_matches)), unit="D"),
+        'HomeTeam': [f"Team {i:03d}" for i in home],
+        'AwayTeam': [f"Team {i:03d}" for i in away],
+        'FTHG': rng.poisson(np.exp(0.25 + strength[home, 0] - strength[away, 1])),
+        'FTAG': rng.poisson(np.exp(strength[away, 0] - strength[home, 1])),
+    })
+
+
+def bench_kernels(repeat: int = 200):
+    import numpy as np
+    from models import kernels
+    from models.dixon_coles import DixonColes, _StackedProblem
+
+    model = DixonColes()
+    problem = _StackedProblem([model], [model._prepare(_synthetic_matches(18, 3000))])
+    x = problem.expand(problem.initial() + 0.01)
+    args = (x, problem.attack_home, problem.attack_away, problem.defense_home, problem.defense_away,
+            problem.home_adv, problem.rho, problem.home_goals, problem.away_goals, problem.weights,
+            problem.log_factorials, problem.reg)
+
+    print("=" * 50)
+    print(f"KERNELS (backends: {', '.join(kernels.available_backends())})")
+    print("=" * 50)
+    reference = None
+    for backend in kernels.available_backends():
+        k = kernels.get_kernels(backend)
+        # First calls include JIT compilation
+        value, grad = k['nll_grad'](*args)
+        matrix = k['score_matrix'](1.7, 0.9, -0.06, 12)
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            k['nll_grad'](*args)
+        nll_us = (time.perf_counter() - start) / repeat * 1e6
+        start = time.perf_counter()
+        for _ in range(repeat):
+            k['score_matrix'](1.7, 0.9, -0.06, 12)
+        matrix_us = (time.perf_counter() - start) / repeat * 1e6
+
+        print(f"\n{backend}:")
+        print(f"   nll_grad ({len(problem.weights)} rows): {nll_us:8.1f} us")
+        print(f"   score_matrix (13x13):      {matrix_us:8.1f} us")
+        if reference is None:
+            reference = (value, grad, matrix)
+        else:
+            diff = max(abs(value - reference[0]), np.max(np.abs(grad - reference[1])), np.max(np.abs(matrix - reference[2])))
+            print(f"   max abs difference to numpy: {diff:.2e}")
+
+
+def bench_scaling(team_counts: Tuple[int, ...] = (18, 36, 72, 150, 300), matches_per_team: int = 60):
+    """Dixon-Coles fit time, peak memory and iterations as the number of teams grows."""
+    import tracemalloc
+    from models.dixon_coles import DixonColes, _fit_single
+
+    # Keep imports and JIT compilation out of the first row
+    _fit_single(DixonColes(), _synthetic_matches(4, 20))
+
+    print("=" * 50)
+    print("DIXON-COLES SCALING (synthetic data)")
+    print("=" * 50)
+    print(f"{'teams':>6} {'matches':>8} {'mode':>7} {'fit s':>8} {'peak MB':>8} {'iters':>6}  status")
+    for n_teams in team_counts:
+        df = _synthetic_matches(n_teams, n_teams * matches_per_team)
+        for mode in ("linear", "log"):
+            model = DixonColes(parameterization=mode)
+            tracemalloc.start()
+            start = time.perf_counter()
+            result = _fit_single(model, df)
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{n_teams:>6} {len(df):>8} {mode:>7} {elapsed:>8.2f} {peak / 1e6:>8.1f} {result.nit:>6}  "
+                  f"{'ok' if result.success else result.message}")
+
+
+def bench_sweep(n_models: int = 50, n_matches: int = 612):
+    """Hyperparameter sweep: fit_many vs. fitting the same Dixon-Coles models one by one."""
+    import numpy as np
+    from models.dixon_coles import DixonColes, fit_many
+
+    df = _synthetic_matches(18, n_matches)
+    alphas = np.linspace(0.0005, 0.005, n_models)
+    # Keep imports and JIT compilation out of the timings
+    fit_many([DixonColes(), DixonColes()], [df, df])
+    DixonColes().fit(df)
+
+    print("=" * 50)
+    print(f"DIXON-COLES SWEEP ({n_models} alphas, {n_matches} matches)")
+    print("=" * 50)
+    for mode in ("linear", "log"):
+        batched = [DixonColes(time_decay_alpha=a, parameterization=mode) for a in alphas]
+        start = time.perf_counter()
+        results = fit_many(batched, [df] * n_models)
+        batched_s = time.perf_counter() - start
+
+        single = [DixonColes(time_decay_alpha=a, parameterization=mode) for a in alphas]
+        start = time.perf_counter()
+        for model in single:
+            model.fit(df)
+        single_s = time.perf_counter() - start
+
+        diff = max(np.max(np.abs(b.attack_params - s.attack_params)) for b, s in zip(batched, single))
+        print(f"\n{mode}:")
+        print(f"   fit_many:   {batched_s:6.3f} s ({max(r.nit for r in results)} iterations)")
+        print(f"   model.fit:  {single_s:6.3f} s")
+        print(f"   max abs attack difference: {diff:.1e}")
+
+
+def bench_odds(n_matches: int = 50000, margin: float = 0.05):
+    """Odds pipeline on synthetic bookmaker odds generated from known goal rates."""
+    import numpy as np
+    from models.odds import OddsModel, _poisson_pmfs, add_odds_features
+
+    rng = np.random.default_rng(0)
+    df = _synthetic_matches(300, n_matches)
+    lambda_home = rng.uniform(0.5, 3.0, n_matches)
+    lambda_away = rng.uniform(0.3, 2.5, n_matches)
+
+    # Fair probabilities under independent Poisson goals, quoted with a bookmaker margin
+    goals = np.arange(13)
+    pmf_home, pmf_away = _poisson_pmfs(lambda_home, 12), _poisson_pmfs(lambda_away, 12)
+    def prob(mask):
+        return np.einsum('ni,ij,nj->n', pmf_home, mask.astype(float), pmf_away)
+    p_home, p_draw = prob(goals[:, None] > goals[None, :]), prob(goals[:, None] == goals[None, :])
+    p_over = prob(goals[:, None] + goals[None, :] > 2.5)
+    for column, p in (('AvgH', p_home), ('AvgD', p_draw), ('AvgA', 1 - p_home - p_draw),
+                      ('Avg>2.5', p_over), ('Avg<2.5', 1 - p_over)):
+        df[column] = 1 / (p * (1 + margin))
+
+    print("=" * 50)
+    print(f"ODDS PIPELINE ({n_matches} synthetic matches)")
+    print("=" * 50)
+    start = time.perf_counter()
+    features = add_odds_features(df)
+    print(f"add_odds_features:  {time.perf_counter() - start:6.2f} s")
+    error = max(np.max(np.abs(features['ImpliedHomeGoals'] - lambda_home)),
+                np.max(np.abs(features['ImpliedAwayGoals'] - lambda_away)))
+    print(f"max abs error of implied goal rates: {error:.2e}")
+
+    start = time.perf_counter()
+    OddsModel().fit(features)
+    print(f"OddsModel.fit:      {time.perf_counter() - start:6.2f} s")
+
+
+BENCHMARKS = {
+    "startup": bench_startup,
+    "kernels": bench_kernels,
+    "scaling": bench_scaling,
+    "sweep": bench_sweep,
+    "odds": bench_odds,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Performance benchmarks for the Kicktipp predictor.")
+    parser.add_argument("benchmark", choices=list(BENCHMARKS), nargs="?", default="startup")
+    args = parser.parse_args()
+    BENCHMARKS[args.benchmark]()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
-import pandas as pd
-from typing import List
+from typing import List, TYPE_CHECKING
 
-def load_bundesliga_data(seasons: List[str] = None) -> pd.DataFrame:
+if TYPE_CHECKING:
+    import pandas as pd
+
+def load_bundesliga_data(seasons: List[str] = None) -> "pd.DataFrame":
     """
     Load Bundesliga match data from football-data.co.uk.
     
@@ -11,6 +13,8 @@ def load_bundesliga_data(seasons: List[str] = None) -> pd.DataFrame:
     Returns:
         DataFrame with match results.
     """
+    import pandas as pd
+
     if seasons is None:
         seasons = ['2526']
     
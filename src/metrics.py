@@ -0,0 +1,90 @@
+"""
+Vectorized probabilistic scores for batches of predicted score matrices.
+
+All functions take `matrices` of shape (n, G+1, G+1) with
+matrices[k, i, j] = P(home=i, away=j) for match k, plus the actual goals as
+integer arrays of length n, and return one value per match.
+"""
+import numpy as np
+
+# Outcome index used throughout: 0 = home win, 1 = draw, 2 = away win
+
+
+def outcome_probabilities(matrices: np.ndarray) -> np.ndarray:
+    """(n, 3) array of P(home win), P(draw), P(away win)."""
+    g = matrices.shape[1]
+    i, j = np.indices((g, g))
+    return np.stack((
+        matrices[:, i > j].sum(axis=1),
+        matrices[:, i == j].sum(axis=1),
+        matrices[:, i < j].sum(axis=1),
+    ), axis=1)
+
+
+def outcomes(home_goals: np.ndarray, away_goals: np.ndarray) -> np.ndarray:
+    """Outcome index (0/1/2) of each actual result."""
+    return 1 - np.sign(home_goals - away_goals)
+
+
+def ranked_probability_score(probs: np.ndarray, actual: np.ndarray) -> np.ndarray:
+    """RPS over the ordered outcomes home/draw/away (0 = perfect, 1 = worst)."""
+    observed = np.eye(3)[actual]
+    cumulative_diff = np.cumsum(probs, axis=1) - np.cumsum(observed, axis=1)
+    return np.sum(cumulative_diff[:, :-1] ** 2, axis=1) / 2
+
+
+def brier_score(probs: np.ndarray, actual: np.ndarray) -> np.ndarray:
+    """Multi-class Brier score over home/draw/away (0 = perfect, 2 = worst)."""
+    return np.sum((probs - np.eye(3)[actual]) ** 2, axis=1)
+
+
+def log_loss(probs: np.ndarray, actual: np.ndarray, eps: float = 1e-15) -> np.ndarray:
+    """Negative log probability of the actual outcome."""
+    return -np.log(np.maximum(probs[np.arange(len(actual)), actual], eps))
+
+
+def score_log_loss(matrices: np.ndarray, home_goals: np.ndarray, away_goals: np.ndarray, eps: float = 1e-15) -> np.ndarray:
+    """Negative log probability of the exact actual score."""
+    g = matrices.shape[1]
+    in_range = (home_goals < g) & (away_goals < g)
+    p = matrices[np.arange(len(home_goals)), np.minimum(home_goals, g - 1), np.minimum(away_goals, g - 1)]
+    return -np.log(np.maximum(np.where(in_range, p, 0.0), eps))
+
+
+def points_grid(tip_home: np.ndarray, tip_away: np.ndarray, g: int) -> np.ndarray:
+    """
+    (n, g, g) Kicktipp points a tip would earn for every possible result.
+    Same rules as src.kicktipp_scoring.get_kicktipp_points.
+    """
+    i, j = np.indices((g, g))
+    tip_home = tip_home[:, None, None]
+    tip_away = tip_away[:, None, None]
+    exact = (i == tip_home) & (j == tip_away)
+    same_difference = (i - j) == (tip_home - tip_away)
+    same_tendency = np.sign(i - j) == np.sign(tip_home - tip_away)
+    return np.where(exact, 4, np.where(same_difference, 3, np.where(same_tendency, 2, 0)))
+
+
+def expected_points(matrices: np.ndarray, tip_home: np.ndarray, tip_away: np.ndarray) -> np.ndarray:
+    """Kicktipp points each tip is expected to earn under its own predicted distribution."""
+    return np.sum(matrices * points_grid(tip_home, tip_away, matrices.shape[1]), axis=(1, 2))
+
+
+def calibration_counts(probs: np.ndarray, actual: np.ndarray, bins: int = 10) -> np.ndarray:
+    """
+    Reliability-diagram sums, so batches can be accumulated.
+
+    Returns:
+        (3, bins, 3) array: for each outcome and probability bin, the number
+        of predictions, the sum of predicted probabilities and the number of
+        times the outcome happened.
+    """
+    observed = np.eye(3)[actual]
+    bin_index = np.minimum((probs * bins).astype(int), bins - 1)
+    counts = np.zeros((3, bins, 3))
+    for outcome in range(3):
+        idx = bin_index[:, outcome]
+        counts[outcome, :, 0] = np.bincount(idx, minlength=bins)
+        counts[outcome, :, 1] = np.bincount(idx, weights=probs[:, outcome], minlength=bins)
+        counts[outcome, :, 2] = np.bincount(idx, weights=observed[:, outcome], minlength=bins)
+    return counts
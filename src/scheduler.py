@@ -0,0 +1,138 @@
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+from src.auth import BASE_URL, create_session
+from src.data import load_bundesliga_data
+from src.scraper import KICKTIPP_TZ, get_upcoming_matches
+from src.submitter import submit_tips
+from models import get_model_class
+
+
+class TipScheduler:
+    """
+    Long-running daemon that submits tips shortly before each kickoff.
+
+    The fitted model and the Kicktipp session stay in memory between events.
+    Historical data is reloaded every `refresh_minutes`; the model is only
+    refit when new results show up. Tips for a match are (re)submitted once
+    we are within `lead_minutes` of its kickoff and the prediction differs
+    from what we last submitted. A failed submit or an error (network,
+    data download) is retried every `retry_minutes` until kickoff.
+
+    `clock`, `sleep`, `session_factory`, `data_loader` and `base_url` can be
+    swapped out to drive the scheduler with a fake clock against a stub server.
+    """
+
+    def __init__(
+        self,
+        config: Dict,
+        clock: Callable[[], datetime] = None,
+        sleep: Callable[[float], None] = time.sleep,
+        session_factory: Callable = create_session,
+        data_loader: Callable = load_bundesliga_data,
+        base_url: str = BASE_URL,
+    ):
+        self.config = config
+        self.clock = clock or (lambda: datetime.now(KICKTIPP_TZ))
+        self.sleep = sleep
+        self.session_factory = session_factory
+        self.data_loader = data_loader
+        self.base_url = base_url
+
+        scheduler_config = config.get('scheduler', {})
+        self.lead_time = timedelta(minutes=scheduler_config.get('lead_minutes', 60))
+        self.refresh_interval = timedelta(minutes=scheduler_config.get('refresh_minutes', 360))
+        self.retry_interval = timedelta(minutes=scheduler_config.get('retry_minutes', 5))
+
+        self.model = None
+        self.session = None
+        self._data_signature = None
+        self._next_refresh: Optional[datetime] = None
+        # (home_field, away_field) -> (home_score, away_score) last sent to Kicktipp
+        self.submitted: Dict[Tuple[str, str], Tuple[int, int]] = {}
+
+    def refresh_model(self) -> bool:
+        """Reload historical data and refit if new results came in."""
+        df = self.data_loader(self.config['data']['seasons'])
+        signature = (len(df), df['Date'].max())
+        if signature == self._data_signature:
+            return False
+
+        if self.model is None:
+            model_name = self.config['model']
+            self.model = get_model_class(model_name)(**self.config.get(model_name, {}))
+        # Refitting the same instance lets models warm-start from the last fit
+        print(f"Fitting {self.model.name} model on {len(df)} matches...")
+        self.model.fit(df)
+        self._data_signature = signature
+        return True
+
+    def fetch_matches(self) -> List[Dict]:
+        """Scrape the tippabgabe page, logging in again if the session expired."""
+        if self.session is None:
+            self.session = self.session_factory(self.base_url)
+        try:
+            return get_upcoming_matches(self.session, self.config['community'], self.base_url)
+        except Exception as e:
+            print(f"⚠️ Fetching matches failed ({e}), logging in again...")
+            self.session = self.session_factory(self.base_url)
+            return get_upcoming_matches(self.session, self.config['community'], self.base_url)
+
+    def run_once(self) -> datetime:
+        """
+        Handle everything that is due now.
+
+        Returns:
+            The time at which the scheduler should wake up next.
+        """
+        now = self.clock()
+        if self._next_refresh is None or now >= self._next_refresh:
+            try:
+                self.refresh_model()
+                self._next_refresh = now + self.refresh_interval
+            except Exception as e:
+                # Keep tipping with the model we already have; retry the download soon
+                print(f"⚠️ Refreshing the model failed: {e}")
+                self._next_refresh = now + self.retry_interval
+
+        matches = [m for m in self.fetch_matches() if m['kickoff'] is not None]
+        due = [m for m in matches if m['kickoff'] - self.lead_time <= now < m['kickoff']]
+        wake_times = [self._next_refresh]
+
+        if due and self.model is not None:
+            predictions = self.model.predict_matches([(m['home_team'], m['away_team']) for m in due])
+            changed = [
+                m for m, p in zip(due, predictions)
+                if "error" not in p
+                and self.submitted.get((m['home_field'], m['away_field'])) != (p['home_score'], p['away_score'])
+            ]
+
+            if changed:
+                # submit_tips skips due matches whose tip is already in the form
+                print(f"\n[{now:%d.%m. %H:%M}] {len(changed)} new or changed tips")
+                if submit_tips(self.session, self.config['community'], due, predictions, self.base_url):
+                    for m, p in zip(due, predictions):
+                        if "error" not in p:
+                            self.submitted[(m['home_field'], m['away_field'])] = (p['home_score'], p['away_score'])
+                elif now + self.retry_interval < max(m['kickoff'] for m in changed):
+                    print(f"⚠️ Submit failed, retrying in {self.retry_interval.total_seconds() / 60:.0f} minutes")
+                    wake_times.append(now + self.retry_interval)
+
+        wake_times += [m['kickoff'] - self.lead_time for m in matches if m['kickoff'] - self.lead_time > now]
+        return min(wake_times)
+
+    def run(self, max_iterations: Optional[int] = None):
+        """Run until interrupted (or for `max_iterations` wake-ups)."""
+        iterations = 0
+        while max_iterations is None or iterations < max_iterations:
+            try:
+                wake_at = self.run_once()
+            except Exception as e:
+                # Network or data errors must not end the daemon; try again shortly
+                print(f"⚠️ Scheduler run failed: {e}")
+                wake_at = self.clock() + self.retry_interval
+            iterations += 1
+            delay = (wake_at - self.clock()).total_seconds()
+            if delay > 0:
+                print(f"💤 Sleeping until {wake_at:%d.%m. %H:%M}")
+                self.sleep(delay)
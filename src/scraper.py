@@ -1,20 +1,51 @@
-from typing import List, Tuple, Dict
-from bs4 import BeautifulSoup
-import requests
+import re
+from datetime import datetime
+from typing import List, Tuple, Dict, Optional, TYPE_CHECKING
+from zoneinfo import ZoneInfo
+from src.auth import BASE_URL
 
-def get_upcoming_matches(session: requests.Session, community: str = "lovers") -> List[Dict]:
+if TYPE_CHECKING:
+    import requests
+
+# Kicktipp shows kickoff times in German local time, e.g. "24.10.25 20:30"
+KICKTIPP_TZ = ZoneInfo("Europe/Berlin")
+KICKOFF_PATTERN = re.compile(r"\d{2}\.\d{2}\.\d{2} \d{2}:\d{2}")
+
+
+def parse_kickoff(text: str) -> Optional[datetime]:
+    """Parse a Kicktipp kickoff cell into a timezone-aware datetime."""
+    match = KICKOFF_PATTERN.search(text)
+    if not match:
+        return None
+    return datetime.strptime(match.group(), "%d.%m.%y %H:%M").replace(tzinfo=KICKTIPP_TZ)
+
+
+def get_upcoming_matches(session: "requests.Session", community: str = "lovers", base_url: str = BASE_URL) -> List[Dict]:
     """
     Scrape upcoming matches from Kicktipp tippabgabe page.
     
     Returns:
-        List of dicts with home_team, away_team, home_field, away_field.
+        List of dicts with home_team, away_team, home_field, away_field and
+        kickoff (None if the page shows no time for the match).
     """
-    url = f"https://www.kicktipp.de/{community}/tippabgabe"
+    from bs4 import BeautifulSoup
+
+    url = f"{base_url}/{community}/tippabgabe"
     resp = session.get(url)
+    if "/profil/login" in resp.url:
+        raise RuntimeError("Kicktipp session expired")
     soup = BeautifulSoup(resp.text, 'html.parser')
     
     matches = []
+    kickoff = None
     for row in soup.find_all('tr'):
+        # Kicktipp only prints the time on the first match of a kickoff slot
+        for cell in row.find_all('td'):
+            cell_kickoff = parse_kickoff(cell.get_text(strip=True))
+            if cell_kickoff:
+                kickoff = cell_kickoff
+                break
+
         home_input = row.find('input', {'name': lambda x: x and 'heimTipp' in x})
         away_input = row.find('input', {'name': lambda x: x and 'gastTipp' in x})
         
@@ -29,6 +60,7 @@ def get_upcoming_matches(session: requests.Session, community: str = "lovers") -
                     'away_team': away_cell.get_text(strip=True),
                     'home_field': home_input['name'],
                     'away_field': away_input['name'],
+                    'kickoff': kickoff,
                 })
     
     return matches
\ No newline at end of file
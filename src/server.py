@@ -0,0 +1,217 @@
+import copy
+import json
+import math
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+from src.data import load_bundesliga_data
+from models import get_model_class
+
+
+class PredictionService:
+    """
+    Keeps one fitted model in memory and refits it when new results appear.
+
+    Refits happen on a copy of the current model (so Dixon-Coles can warm
+    start) and the fitted copy is swapped in afterwards, so requests never
+    see a half-fitted model and never wait for a refit.
+    """
+
+    def __init__(self, config: Dict, data_loader: Callable = load_bundesliga_data):
+        self.config = config
+        self.data_loader = data_loader
+        self.model = None
+        self.fitted_at: Optional[datetime] = None
+        self.matches = 0
+        self._data_signature = None
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def reload(self) -> bool:
+        """Reload historical data; refit and swap the model if it changed."""
+        with self._reload_lock:
+            df = self.data_loader(self.config['data']['seasons'])
+            signature = (len(df), df['Date'].max())
+            if signature == self._data_signature:
+                return False
+
+            if self.model is None:
+                model_name = self.config['model']
+                model = get_model_class(model_name)(**self.config.get(model_name, {}))
+            else:
+                model = copy.deepcopy(self.model)
+            model.fit(df)
+
+            self.model = model
+            self.fitted_at = datetime.now()
+            self.matches = len(df)
+            self._data_signature = signature
+            print(f"✓ Fitted {model.name} model on {len(df)} matches")
+            return True
+
+    def start_reloading(self, interval_minutes: float) -> threading.Thread:
+        """Check for new results every `interval_minutes` in a background thread."""
+        def loop():
+            while not self._stop.wait(interval_minutes * 60):
+                try:
+                    self.reload()
+                except Exception as e:
+                    print(f"⚠️ Reload failed: {e}")
+
+        thread = threading.Thread(target=loop, daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+class NoPrediction(ValueError):
+    """The model has no finite prediction for a fixture (e.g. a team without away games yet)."""
+
+
+def _expected_goals(model, home: str, away: str) -> tuple:
+    lam_home, lam_away = model.expected_goals(home, away)
+    if not (math.isfinite(lam_home) and math.isfinite(lam_away)):
+        raise NoPrediction(f"No prediction for {home} vs {away} (not enough games)")
+    return float(lam_home), float(lam_away)
+
+
+def _make_handler(service: PredictionService):
+    class PredictionHandler(BaseHTTPRequestHandler):
+        """
+        GET  /health                   model name, fit time and training size
+        GET  /predict?home=..&away=..  most likely score and expected goals
+        GET  /matrix?home=..&away=..   full score probability matrix
+        GET  /proba?home=..&away=..    market probabilities (1X2, over/under, btts)
+        GET  /stats                    score matrix cache counters
+        POST /predict                  {"fixtures": [[home, away], ...]}
+
+        Unknown teams give 404, fixtures without a finite prediction 422.
+        """
+
+        def _send(self, status: int, body) -> None:
+            try:
+                payload = json.dumps(body, allow_nan=False).encode("utf-8")
+            except ValueError:
+                # NaN/inf that slipped past the checks below; never send invalid JSON
+                status = 500
+                payload = json.dumps({"error": "Non-finite value in response"}).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _fixture(self, query: Dict) -> tuple:
+            if "home" not in query or "away" not in query:
+                raise ValueError("Query parameters 'home' and 'away' are required")
+            return query["home"][0], query["away"][0]
+
+        def do_GET(self):
+            from models import cache
+
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            # Read once so a concurrent reload can't swap the model mid-request
+            model = service.model
+            try:
+                if url.path == "/health":
+                    self._send(200, {
+                        "model": model.name if model else None,
+                        "fitted_at": service.fitted_at.isoformat() if service.fitted_at else None,
+                        "matches": service.matches,
+                    })
+                elif url.path == "/stats":
+                    self._send(200, cache.SCORE_CACHE.stats())
+                elif model is None:
+                    self._send(503, {"error": "Model not fitted yet"})
+                elif url.path == "/predict":
+                    home, away = self._fixture(query)
+                    lam_home, lam_away = _expected_goals(model, home, away)
+                    h, a = model.predict(home, away)
+                    self._send(200, {
+                        "home_team": home,
+                        "away_team": away,
+                        "home_score": h,
+                        "away_score": a,
+                        "expected_goals": [lam_home, lam_away],
+                    })
+                elif url.path == "/matrix":
+                    home, away = self._fixture(query)
+                    _expected_goals(model, home, away)
+                    matrix = model.score_matrix(home, away)
+                    if not np.isfinite(matrix).all():
+                        raise NoPrediction(f"No prediction for {home} vs {away} (non-finite score matrix)")
+                    self._send(200, {"home_team": home, "away_team": away, "matrix": matrix.tolist()})
+                elif url.path == "/proba":
+                    home, away = self._fixture(query)
+                    _expected_goals(model, home, away)
+                    self._send(200, {"home_team": home, "away_team": away, **model.predict_proba(home, away)})
+                else:
+                    self._send(404, {"error": f"Unknown endpoint {url.path}"})
+            except KeyError as e:
+                self._send(404, {"error": str(e).strip("'")})
+            except NoPrediction as e:
+                self._send(422, {"error": str(e)})
+            except ValueError as e:
+                self._send(400, {"error": str(e)})
+
+        def do_POST(self):
+            model = service.model
+            if urlparse(self.path).path != "/predict":
+                self._send(404, {"error": f"Unknown endpoint {self.path}"})
+                return
+            if model is None:
+                self._send(503, {"error": "Model not fitted yet"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                fixtures = [(home, away) for home, away in body["fixtures"]]
+            except (ValueError, KeyError, TypeError):
+                self._send(400, {"error": 'Expected JSON body {"fixtures": [[home, away], ...]}'})
+                return
+            results = model.predict_matches(fixtures)
+            for result in results:
+                if "error" in result:
+                    continue
+                try:
+                    _expected_goals(model, result["home_team"], result["away_team"])
+                except NoPrediction as e:
+                    del result["home_score"], result["away_score"]
+                    result["error"] = str(e)
+            self._send(200, results)
+
+        def log_message(self, format, *args):
+            pass
+
+    return PredictionHandler
+
+
+def create_server(service: PredictionService, host: str = "127.0.0.1", port: int = 8000) -> ThreadingHTTPServer:
+    """HTTP server for `service`; port 0 picks a free port (see server.server_port)."""
+    return ThreadingHTTPServer((host, port), _make_handler(service))
+
+
+def serve(config: Dict) -> None:
+    """Fit once, then serve predictions until interrupted."""
+    server_config = config.get('server', {})
+    service = PredictionService(config)
+    print("Loading historical data...")
+    service.reload()
+    service.start_reloading(server_config.get('reload_minutes', 60))
+
+    server = create_server(service, server_config.get('host', "127.0.0.1"), server_config.get('port', 8000))
+    host, port = server.server_address[:2]
+    print(f"🚀 Serving predictions on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop()
+        server.server_close()
@@ -1,13 +1,16 @@
-from typing import List, Dict
-from bs4 import BeautifulSoup
-import requests
+from typing import List, Dict, TYPE_CHECKING
+from src.auth import BASE_URL
+
+if TYPE_CHECKING:
+    import requests
 
 
 def submit_tips(
-    session: requests.Session,
+    session: "requests.Session",
     community: str,
     matches: List[Dict],
-    predictions: List[Dict]
+    predictions: List[Dict],
+    base_url: str = BASE_URL
 ) -> bool:
     """
     Submit predictions to Kicktipp.
@@ -18,9 +21,15 @@ def submit_tips(
         matches: List of match dicts with home_team, away_team, home_field, away_field
         predictions: List of prediction dicts with home_team, away_team, home_score, away_score
     
+    Only matches whose tip differs from the value already in the form are
+    sent; locked matches are skipped. Success is checked against the tips
+    shown on the page Kicktipp returns, not just the status code.
+    
     Returns:
-        True if submission was successful
+        True if all changed tips were saved (or nothing needed to change)
     """
+    from bs4 import BeautifulSoup
+
     # Build lookup: (home_team, away_team) -> (home_score, away_score)
     pred_lookup = {}
     for p in predictions:
@@ -28,7 +37,7 @@ def submit_tips(
             pred_lookup[(p['home_team'], p['away_team'])] = (p['home_score'], p['away_score'])
     
     # Fetch the form page to get hidden fields
-    tip_url = f"https://www.kicktipp.de/{community}/tippabgabe"
+    tip_url = f"{base_url}/{community}/tippabgabe"
     resp = session.get(tip_url)
     soup = BeautifulSoup(resp.text, 'html.parser')
     
@@ -37,7 +46,7 @@ def submit_tips(
         print("❌ Tip form not found on tippabgabe page")
         return False
     
-    post_url = "https://www.kicktipp.de" + form.get("action")
+    post_url = base_url + form.get("action")
     
     # Collect hidden fields
     payload = {}
@@ -47,33 +56,73 @@ def submit_tips(
         if name:
             payload[name] = value
     
-    # Fill tips for each match
-    filled = 0
+    # Keep the tips already in the form so open matches we don't touch stay as they are
+    current = _tip_inputs(form)
+    for name, (value, disabled) in current.items():
+        if not disabled:
+            payload[name] = value
+    
+    # Fill tips for each match, but only where something changed
+    changed = {}
+    tipped = 0
     for m in matches:
         key = (m['home_team'], m['away_team'])
-        if key in pred_lookup:
-            h, a = pred_lookup[key]
-            payload[m['home_field']] = str(h)
-            payload[m['away_field']] = str(a)
-            filled += 1
-            print(f"   ✓ {m['home_team']} {h} - {a} {m['away_team']}")
-        else:
+        if key not in pred_lookup:
             print(f"   ⚠️ No prediction for {m['home_team']} vs {m['away_team']}, skipping.")
+            continue
+        tipped += 1
+        h, a = (str(v) for v in pred_lookup[key])
+        home_input = current.get(m['home_field'])
+        away_input = current.get(m['away_field'])
+        if home_input is None or away_input is None or home_input[1] or away_input[1]:
+            print(f"   🔒 {m['home_team']} vs {m['away_team']} is locked, skipping.")
+        elif (home_input[0], away_input[0]) == (h, a):
+            print(f"   = {m['home_team']} {h} - {a} {m['away_team']} (unchanged)")
+        else:
+            changed[m['home_field']] = h
+            changed[m['away_field']] = a
+            print(f"   ✓ {m['home_team']} {h} - {a} {m['away_team']}")
     
-    if filled == 0:
+    if tipped == 0:
         print("❌ No tips to submit")
         return False
+    if not changed:
+        print("\n✅ All tips already up to date, nothing to submit.")
+        return True
     
-    print(f"\nSubmitting {filled} tips...")
+    payload.update(changed)
+    print(f"\nSubmitting {len(changed) // 2} tips...")
     submit_resp = session.post(post_url, data=payload)
     
-    if submit_resp.status_code == 200:
-        print("✅ Tipps gespeichert successfully!")
-        return True
-    else:
+    if submit_resp.status_code != 200:
         print(f"❌ Submit failed (status: {submit_resp.status_code})")
-        sub_soup = BeautifulSoup(submit_resp.text, 'html.parser')
-        errors = sub_soup.find_all(class_=['messages', 'res_error', 'ct_error'])
-        for e in errors:
-            print(f"   Error: {e.get_text(strip=True)}")
-        return False
\ No newline at end of file
+        _print_errors(BeautifulSoup(submit_resp.text, 'html.parser'))
+        return False
+    
+    # Kicktipp answers with the tippabgabe page again: check it shows our tips
+    sub_soup = BeautifulSoup(submit_resp.text, 'html.parser')
+    saved = _tip_inputs(sub_soup)
+    if not saved:
+        saved = _tip_inputs(BeautifulSoup(session.get(tip_url).text, 'html.parser'))
+    not_saved = [name for name, value in changed.items() if saved.get(name, (None,))[0] != value]
+    if not_saved:
+        print(f"❌ Kicktipp did not save all tips ({', '.join(not_saved)})")
+        _print_errors(sub_soup)
+        return False
+    
+    print("✅ Tipps gespeichert successfully!")
+    return True
+
+
+def _tip_inputs(soup) -> Dict[str, tuple]:
+    """Map tip input name -> (current value, disabled) for all heimTipp/gastTipp inputs."""
+    inputs = {}
+    for inp in soup.find_all('input', {'name': lambda x: x and ('heimTipp' in x or 'gastTipp' in x)}):
+        inputs[inp['name']] = (inp.get('value', ''), inp.has_attr('disabled'))
+    return inputs
+
+
+def _print_errors(soup) -> None:
+    errors = soup.find_all(class_=['messages', 'res_error', 'ct_error'])
+    for e in errors:
+        print(f"   Error: {e.get_text(strip=True)}")
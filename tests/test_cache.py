@@ -0,0 +1,15 @@
+import numpy as np
+
+from models import kernels
+from models.cache import ScoreMatrixCache
+
+
+def test_non_finite_inputs_bypass_the_cache():
+    cache = ScoreMatrixCache(maxsize=2)
+    cache.get(1.2, 0.8, 0.0, 12, kernels.score_matrix)
+    for _ in range(3):
+        assert np.isnan(cache.get(float("nan"), 0.8, 0.0, 12, kernels.score_matrix)).all()
+    cache.get(1.2, 0.8, 0.0, 12, kernels.score_matrix)
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
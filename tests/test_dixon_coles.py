@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from models.dixon_coles import DixonColes, fit_many
+from src.benchmark import _synthetic_matches
+
+
+@pytest.mark.parametrize("parameterization", ["linear", "log"])
+def test_fit_many_matches_separate_fits(parameterization):
+    # Blocks of different sizes and team sets, plus one DataFrame used twice
+    shared = _synthetic_matches(10, 400, seed=1)
+    dfs = [_synthetic_matches(8, 300, seed=0), shared, shared, _synthetic_matches(14, 700, seed=2)]
+    settings = [(0.001, 0.01), (0.0005, 0.01), (0.005, 0.05), (0.002, 0.001)]
+
+    batched = [DixonColes(alpha, reg, parameterization=parameterization) for alpha, reg in settings]
+    results = fit_many(batched, dfs)
+    assert all(result.success for result in results)
+
+    for model, df, (alpha, reg) in zip(batched, dfs, settings):
+        single = DixonColes(alpha, reg, parameterization=parameterization)
+        single.fit(df)
+        assert list(model.attack_params.index) == list(single.attack_params.index)
+        np.testing.assert_allclose(model.attack_params, single.attack_params, atol=1e-5)
+        np.testing.assert_allclose(model.defense_params, single.defense_params, atol=1e-5)
+        np.testing.assert_allclose([model.home_advantage, model.rho], [single.home_advantage, single.rho], atol=1e-5)
+
+
+def test_fit_many_rejects_mixed_parameterizations():
+    df = _synthetic_matches(6, 100)
+    with pytest.raises(ValueError):
+        fit_many([DixonColes(), DixonColes(parameterization="log")], [df, df])
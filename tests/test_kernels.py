@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+from scipy.special import gammaln
+from scipy.stats import poisson
+
+from models import kernels
+
+
+@pytest.fixture(scope="module")
+def backends():
+    # Only the cross-backend comparisons need Numba
+    pytest.importorskip("numba")
+    return kernels.get_kernels("numpy"), kernels.get_kernels("numba")
+
+
+def _tau(i, j, lam_home, lam_away, rho):
+    """Dixon-Coles correction as in the original per-cell implementation."""
+    if i == 0 and j == 0:
+        value = 1 - lam_home * lam_away * rho
+    elif i == 1 and j == 0:
+        value = 1 + lam_away * rho
+    elif i == 0 and j == 1:
+        value = 1 + lam_home * rho
+    elif i == 1 and j == 1:
+        value = 1 - rho
+    else:
+        value = 1.0
+    return max(1e-9, value)
+
+
+def _nll_args(rho: float):
+    """Two-team problem covering every tau branch (0-0, 1-0, 0-1, 1-1) plus ordinary scores."""
+    home_goals = np.array([0, 1, 0, 1, 2, 3, 0, 1])
+    away_goals = np.array([0, 0, 1, 1, 2, 0, 4, 0])
+    n = len(home_goals)
+    home = np.array([0, 1, 0, 1, 0, 1, 0, 1])
+    away = 1 - home
+    # Parameter vector: attack[0..2), defense[0..2), home_adv, rho
+    x = np.array([1.4, 0.8, 1.1, 0.9, 1.3, rho])
+    return (
+        x, home, away, 2 + home, 2 + away, np.full(n, 4), np.full(n, 5),
+        home_goals, away_goals, np.linspace(0.5, 1.0, n),
+        gammaln(home_goals + 1) + gammaln(away_goals + 1),
+        np.full(len(x), 0.01),
+    )
+
+
+# rho = 0: no correction; +-0.1: typical; 0.9 and -2.0 clip tau at 1e-9 in some cells
+@pytest.mark.parametrize("rho", [0.0, 0.1, -0.1, 0.9, -2.0])
+def test_nll_grad_backends_agree(backends, rho):
+    numpy_kernels, numba_kernels = backends
+    args = _nll_args(rho)
+    value, grad = numpy_kernels["nll_grad"](*args)
+    numba_value, numba_grad = numba_kernels["nll_grad"](*args)
+    np.testing.assert_allclose(numba_value, value, rtol=1e-10)
+    np.testing.assert_allclose(numba_grad, grad, rtol=1e-9, atol=1e-12)
+
+
+def test_nll_grad_clipping_is_exercised():
+    # Guard for the parametrization above: 0.9 and -2.0 must actually clip tau
+    x, *_ = _nll_args(0.9)
+    lam_home, lam_away = x[0] * x[3] * x[4], x[1] * x[2]
+    assert 1 - lam_home * lam_away * 0.9 < 1e-9
+    assert 1 + lam_away * -2.0 < 1e-9
+
+
+@pytest.mark.parametrize("lam_home, lam_away, rho", [
+    (1.7, 0.9, 0.0),
+    (1.7, 0.9, -0.06),
+    (0.4, 2.8, 0.12),
+    (2.5, 2.0, 0.5),    # 1 - lam_home * lam_away * rho clipped
+    (1.2, 1.5, -1.0),   # 1 + lam * rho clipped
+])
+def test_score_matrix_backends_agree(backends, lam_home, lam_away, rho):
+    numpy_kernels, numba_kernels = backends
+    expected = numpy_kernels["score_matrix"](lam_home, lam_away, rho, 12)
+    np.testing.assert_allclose(numba_kernels["score_matrix"](lam_home, lam_away, rho, 12), expected,
+                               rtol=1e-12, atol=1e-15)
+
+
+@pytest.mark.parametrize("lam_home, lam_away, rho", [
+    (1.7, 0.9, 0.0),
+    (1.7, 0.9, -0.06),
+    (0.4, 2.8, 0.12),
+    (2.5, 2.0, 0.5),
+])
+def test_score_matrix_numpy_matches_scipy(lam_home, lam_away, rho):
+    goals = np.arange(13)
+    expected = np.outer(poisson.pmf(goals, lam_home), poisson.pmf(goals, lam_away))
+    for i in range(2):
+        for j in range(2):
+            expected[i, j] *= _tau(i, j, lam_home, lam_away, rho)
+    np.testing.assert_allclose(kernels.score_matrix_numpy(lam_home, lam_away, rho, 12), expected,
+                               rtol=1e-12, atol=1e-15)
+
+
+@pytest.mark.parametrize("rho", [0.0, 0.1, -0.1, 0.9, -2.0])
+def test_nll_grad_numpy_matches_finite_differences(rho):
+    x, *rest = _nll_args(rho)
+    _, grad = kernels.nll_grad_numpy(x, *rest)
+
+    h = 1e-6
+    numeric = np.empty_like(x)
+    for k in range(len(x)):
+        step = np.zeros_like(x)
+        step[k] = h
+        numeric[k] = (kernels.nll_grad_numpy(x + step, *rest)[0] - kernels.nll_grad_numpy(x - step, *rest)[0]) / (2 * h)
+    np.testing.assert_allclose(grad, numeric, rtol=1e-6, atol=1e-7)
@@ -0,0 +1,186 @@
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import numpy as np
+import pandas as pd
+import pytest
+import requests
+
+from src.scheduler import TipScheduler
+from src.scraper import KICKTIPP_TZ
+
+TEAMS = ["Bayern Munich", "Dortmund", "Leverkusen", "Stuttgart", "Freiburg", "Hamburg", "St Pauli"]
+# (kickoff cell, Kicktipp home name, Kicktipp away name); empty cell = same slot as the row above
+FIXTURES = [
+    ("25.10.25 15:30", "FC Bayern München", "Borussia Dortmund"),
+    ("", "VfB Stuttgart", "SC Freiburg"),
+    ("25.10.25 18:30", "Hamburger SV", "FC St. Pauli"),
+]
+
+
+def _history() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    rows = []
+    date = pd.Timestamp("2024-08-01")
+    for home in TEAMS:
+        for away in TEAMS:
+            if home != away:
+                rows.append({"Date": date, "HomeTeam": home, "AwayTeam": away,
+                             "FTHG": rng.poisson(1.6), "FTAG": rng.poisson(1.2)})
+                date += pd.Timedelta(days=1)
+    return pd.DataFrame(rows)
+
+
+class StubKicktipp:
+    """Tippabgabe page that remembers posted tips; can be told to fail POSTs."""
+
+    def __init__(self):
+        self.tips = {}
+        self.posts = []
+        self.failing_posts = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _page(self, status=200):
+                body = stub.render().encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                self._page()
+
+            def do_POST(self):
+                data = parse_qs(self.rfile.read(int(self.headers["Content-Length"])).decode("utf-8"))
+                stub.posts.append(data)
+                if stub.failing_posts:
+                    stub.failing_posts -= 1
+                    self._page(500)
+                    return
+                stub.tips.update({k: v[0] for k, v in data.items() if "Tipp" in k})
+                self._page()
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def render(self) -> str:
+        rows = []
+        for i, (kickoff, home, away) in enumerate(FIXTURES, start=1):
+            home_field, away_field = f"m{i}_heimTipp", f"m{i}_gastTipp"
+            rows.append(
+                f'<tr><td>{kickoff}</td><td class="heim">{home}</td><td class="gast">{away}</td>'
+                f'<td><input name="{home_field}" value="{self.tips.get(home_field, "")}"/>'
+                f'<input name="{away_field}" value="{self.tips.get(away_field, "")}"/></td></tr>'
+            )
+        return ('<html><form action="/lovers/tippabgabe/save">'
+                '<input type="hidden" name="token" value="1"/><table>' + "".join(rows) + "</table></form></html>")
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class FakeClock:
+    def __init__(self, start: datetime):
+        self.now = start
+
+    def __call__(self) -> datetime:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += timedelta(seconds=seconds)
+
+
+@pytest.fixture
+def stub():
+    server = StubKicktipp()
+    yield server
+    server.close()
+
+
+def _scheduler(stub, clock, data_loader=None):
+    history = _history()
+    config = {
+        "community": "lovers",
+        "model": "poisson",
+        "data": {"seasons": ["2425"]},
+        "scheduler": {"lead_minutes": 60, "refresh_minutes": 360, "retry_minutes": 5},
+    }
+    return TipScheduler(
+        config,
+        clock=clock,
+        sleep=clock.sleep,
+        session_factory=lambda base_url: requests.Session(),
+        data_loader=data_loader or (lambda seasons: history),
+        base_url=stub.url,
+    )
+
+
+def test_submits_each_slot_lead_minutes_before_kickoff(stub):
+    clock = FakeClock(datetime(2025, 10, 25, 9, 0, tzinfo=KICKTIPP_TZ))
+    scheduler = _scheduler(stub, clock)
+
+    assert scheduler.run_once() == datetime(2025, 10, 25, 14, 30, tzinfo=KICKTIPP_TZ)
+    assert stub.posts == []
+
+    # Wake-ups: 09:00 (again, nothing slept yet), 14:30 submit, 15:00 refresh, 17:30 submit
+    scheduler.run(max_iterations=4)
+    assert len(stub.posts) == 2
+    assert {"m1_heimTipp", "m2_heimTipp"} <= set(stub.posts[0])
+    assert all(stub.tips.get(f"m{i}_{side}Tipp") for i in (1, 2, 3) for side in ("heim", "gast"))
+
+
+def test_failed_submit_is_retried_before_kickoff(stub):
+    clock = FakeClock(datetime(2025, 10, 25, 17, 30, tzinfo=KICKTIPP_TZ))
+    scheduler = _scheduler(stub, clock)
+    stub.failing_posts = 1
+
+    assert scheduler.run_once() == clock.now + timedelta(minutes=5)
+    assert stub.tips == {}
+
+    scheduler.run(max_iterations=2)
+    assert len(stub.posts) == 2
+    assert stub.tips["m3_heimTipp"] != ""
+
+
+def test_run_survives_errors(stub):
+    clock = FakeClock(datetime(2025, 10, 25, 17, 30, tzinfo=KICKTIPP_TZ))
+    history = _history()
+    calls = []
+
+    def flaky_loader(seasons):
+        calls.append(clock.now)
+        if len(calls) == 1:
+            raise RuntimeError("No data loaded")
+        return history
+
+    scheduler = _scheduler(stub, clock, data_loader=flaky_loader)
+    scheduler.run(max_iterations=2)
+
+    assert calls == [datetime(2025, 10, 25, 17, 30, tzinfo=KICKTIPP_TZ),
+                     datetime(2025, 10, 25, 17, 35, tzinfo=KICKTIPP_TZ)]
+    assert len(stub.posts) == 1
+
+
+def test_keeps_tipping_with_fitted_model_when_data_source_is_down(stub):
+    clock = FakeClock(datetime(2025, 10, 25, 9, 0, tzinfo=KICKTIPP_TZ))
+    history = _history()
+
+    def loader(seasons):
+        if clock.now >= datetime(2025, 10, 25, 15, 0, tzinfo=KICKTIPP_TZ):
+            raise RuntimeError("No data loaded")
+        return history
+
+    scheduler = _scheduler(stub, clock, data_loader=loader)
+    scheduler.run(max_iterations=60)
+
+    assert clock.now > datetime(2025, 10, 25, 18, 30, tzinfo=KICKTIPP_TZ)
+    assert len(stub.posts) == 2
+    assert all(stub.tips.get(f"m{i}_{side}Tipp") for i in (1, 2, 3) for side in ("heim", "gast"))
@@ -0,0 +1,99 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+import requests
+
+from src.server import PredictionService, create_server
+
+TEAMS = ["Bayern Munich", "Dortmund", "Leverkusen", "Stuttgart", "Freiburg"]
+
+
+def _history(start: str = "2024-08-01") -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    rows = []
+    date = pd.Timestamp(start)
+    for home in TEAMS:
+        for away in TEAMS:
+            if home != away:
+                rows.append({"Date": date, "HomeTeam": home, "AwayTeam": away,
+                             "FTHG": rng.poisson(1.6), "FTAG": rng.poisson(1.2)})
+                date += pd.Timedelta(days=1)
+    # Promoted team with a single home game: no away rates, so no finite prediction away from home
+    rows.append({"Date": date, "HomeTeam": "Hamburg", "AwayTeam": "Dortmund", "FTHG": 1, "FTAG": 1})
+    return pd.DataFrame(rows)
+
+
+class Loader:
+    """Injected data_loader whose history the test can replace."""
+
+    def __init__(self):
+        self.history = _history()
+
+    def __call__(self, seasons):
+        return self.history
+
+
+@pytest.fixture
+def served():
+    loader = Loader()
+    service = PredictionService({"model": "poisson", "data": {"seasons": ["2425"]}}, data_loader=loader)
+    service.reload()
+    server = create_server(service, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield service, loader, f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_predict(served):
+    service, _, url = served
+    response = requests.get(f"{url}/predict", params={"home": "Bayern Munich", "away": "Dortmund"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["home_team"] == "Bayern Munich"
+    assert (body["home_score"], body["away_score"]) == service.model.predict("Bayern Munich", "Dortmund")
+    assert all(np.isfinite(body["expected_goals"]))
+
+
+def test_unknown_team_is_404(served):
+    _, _, url = served
+    for endpoint in ("predict", "matrix", "proba"):
+        response = requests.get(f"{url}/{endpoint}", params={"home": "Bayern Munich", "away": "Nowhere FC"})
+        assert response.status_code == 404
+
+
+def test_non_finite_prediction_is_422(served):
+    service, _, url = served
+    assert not np.isfinite(service.model.expected_goals("Dortmund", "Hamburg")).all()
+    for endpoint in ("predict", "matrix", "proba"):
+        response = requests.get(f"{url}/{endpoint}", params={"home": "Dortmund", "away": "Hamburg"})
+        assert response.status_code == 422
+        assert "Hamburg" in response.json()["error"]
+
+
+def test_post_predict(served):
+    _, _, url = served
+    fixtures = [["Bayern Munich", "Dortmund"], ["Dortmund", "Hamburg"], ["Bayern Munich", "Nowhere FC"]]
+    response = requests.post(f"{url}/predict", json={"fixtures": fixtures})
+    assert response.status_code == 200
+    ok, no_prediction, unknown = response.json()
+    assert {"home_score", "away_score"} <= set(ok)
+    assert "error" in no_prediction and "home_score" not in no_prediction
+    assert "error" in unknown
+
+    assert requests.post(f"{url}/predict", json={"matches": []}).status_code == 400
+
+
+def test_reload_swaps_model_only_on_new_data(served):
+    service, loader, url = served
+    fitted = service.model
+    assert not service.reload()
+    assert service.model is fitted
+
+    loader.history = pd.concat([_history(), _history("2025-08-01")], ignore_index=True)
+    assert service.reload()
+    assert service.model is not fitted
+    assert requests.get(f"{url}/health").json()["matches"] == len(loader.history)
+    assert requests.get(f"{url}/predict", params={"home": "Bayern Munich", "away": "Dortmund"}).status_code == 200